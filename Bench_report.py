@@ -0,0 +1,24 @@
+"""
+Benchmark report helpers
+------------------------
+Shared by the headless benchmarks and the self-play arena
+(Sudoku_bench.py, Black_hole_bench.py, Black_hole_arena.py), so their
+percentiles and table columns agree.
+"""
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list; None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def fmt(value, width, digits=0, grouping=False):
+    """value right-aligned in width columns with `digits` decimals (and
+    thousands separators if grouping); '-' for None."""
+    if value is None:
+        return f"{'-':>{width}}"
+    sep = "," if grouping else ""
+    return f"{value:>{width}{sep}.{digits}f}"
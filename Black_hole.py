@@ -1,12 +1,10 @@
-import pygame, sys, math
+import pygame, sys, os, time, queue
+import multiprocessing as mp
+from collections import deque
+import Black_hole_engine as engine
+import Black_hole_mcts as mcts
 
-pygame.init()
 WIDTH, HEIGHT = 900, 650
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Black Hole Pyramid")
-CLOCK = pygame.time.Clock()
-FONT = pygame.font.SysFont("Consolas", 20)
-BIGFONT = pygame.font.SysFont("Consolas", 40)
 
 # Colors
 BLACK = (0,0,0)
@@ -15,33 +13,100 @@ GREEN = (0,255,0)
 GRAY = (100,100,100)
 WHITE = (255,255,255)
 
+# memory budget of the AI's transposition table
+TT_MEGABYTES = 32
+# seconds the AI may think per move (menu range 1-10); it plays the move of
+# the deepest search finished by then
+AI_TIME = 3
+# processes searching root moves in parallel; 1 searches in the AI process itself
+AI_WORKERS = min(4, os.cpu_count() or 1)
+# from this many empty circles on the AI searches to the end of the game
+EXACT_EMPTIES = 8
+# pyramid rows offered in the menu; each player holds 1..circles // 2
+MIN_ROWS, MAX_ROWS = 6, engine.MAX_ROWS
+# written by `python Black_hole_tablebase.py black_hole_tb.bin`; used if present
+TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "black_hole_tb.bin")
+
 class Game:
     def __init__(self):
         self.state = "menu" # menu, playing, gameover
         self.vs_ai = False
         self.ai_depth = 2
+        # "minimax" (engine.think_worker) or "mcts" (Black_hole_mcts.py)
+        self.ai_engine = "minimax"
         self.current_player = 1
-        self.board = [None]*21
+        self.set_rows(6)
         self.last_placed = None
-        self.available_numbers = {1:set(range(1,11)), 2:set(range(1,11))}
         self.selected_number = None
         self.winner = None
         self.main_menu_buttons = []
-        self.num_panels = {1:[], 2:[]}
+        # kept across AI moves: positions are keyed by placements, not move order
+        self.tablebase_path = TABLEBASE_PATH if os.path.exists(TABLEBASE_PATH) else None
+        self.ai_time = AI_TIME
+        self.ai_info = ""
+        # background search: process, result queue, start time, deepest result so far
+        self.ai_worker = None
+        self.ai_queue = None
+        self.ai_stop = None
+        # stopped parallel searches still shutting their pools down
+        self.ai_retired = []
+        self.ai_started = 0
+        self.ai_best = None
+        self.ai_reached = 0
+        # counters of the AI's current or last move (engine.move_stats), shown
+        # in an overlay toggled with the I key
+        self.ai_stats = None
+        self.show_stats = False
+        # the MCTS process lives for the whole session so its tree carries
+        # over between moves; requests are numbered so late replies from an
+        # abandoned search are ignored
+        self.mcts_process = None
+        self.mcts_requests = None
+        self.mcts_out = None
+        self.mcts_request = 0
+
+    def set_rows(self, rows):
+        # board size, hands and layout all follow from the row count
+        self.rows = rows
+        self.geometry = engine.pyramid(rows)
+        self.board = [None]*self.geometry.cells
+        self.available_numbers = {1:set(self.geometry.numbers), 2:set(self.geometry.numbers)}
+        self.num_panels = self.get_number_panels()
+        if rows == 6:
+            # the classic layout
+            self.row_step, self.top = 70, 80
+        else:
+            # rows shrink to fit the pyramid between the two number panels
+            space = self.num_panels[1][0][1].top - self.num_panels[2][0][1].bottom - 10
+            self.row_step = min(70, int(space / (rows - 1 + 50/70)))
+            self.top = self.num_panels[2][0][1].bottom + 5 + self.row_step * 25 // 70
+        self.radius = self.row_step * 25 // 70
         self.circle_positions = self.get_circle_positions()
 
     def get_circle_positions(self):
         positions = {}
         idx = 0
-        for row in range(6):
-            y = 80 + row*70
-            start_x = WIDTH//2 - row*50
+        dx = self.row_step * 100 // 70
+        for row in range(self.rows):
+            y = self.top + row*self.row_step
+            start_x = WIDTH//2 - row*dx//2
             for col in range(row+1):
-                x = start_x + col*100
+                x = start_x + col*dx
                 positions[idx] = (x,y)
                 idx+=1
         return positions
 
+    def get_number_panels(self):
+        # player 2's numbers along the top, player 1's along the bottom
+        numbers = self.geometry.numbers
+        step = min(70, (WIDTH - 100) // len(numbers))
+        size = step * 5 // 7
+        panels = {}
+        for player, y_offset in ((1, 500), (2, 50)):
+            panels[player] = [(num, pygame.Rect(50 + idx*step, y_offset, size, size))
+                              for idx, num in enumerate(numbers)]
+        return panels
+
     # --- Drawing Functions ---
     def draw_menu(self):
         SCREEN.fill(BLACK)
@@ -90,41 +155,63 @@ class Game:
         SCREEN.blit(plus_txt, (plus_rect.centerx - plus_txt.get_width()//2, plus_rect.centery - plus_txt.get_height()//2))
         self.main_menu_buttons.append(("depth_plus", plus_rect))
 
-        # small helper text
-        hint = FONT.render("Use +/- to change AI search depth (1-6)", True, WHITE)
-        SCREEN.blit(hint, (WIDTH//2 - hint.get_width()//2, depth_y + 60))
+        # search engine toggle; MCTS ignores the depth and uses the whole time budget
+        engine_rect = pygame.Rect(WIDTH//2 + 130, depth_y, 170, 40)
+        pygame.draw.rect(SCREEN, GRAY, engine_rect)
+        engine_txt = FONT.render("MCTS" if self.ai_engine == "mcts" else "Minimax", True, BLACK)
+        SCREEN.blit(engine_txt, (engine_rect.centerx - engine_txt.get_width()//2, engine_rect.centery - engine_txt.get_height()//2))
+        self.main_menu_buttons.append(("engine", engine_rect))
 
-    def draw_board(self):
-        SCREEN.fill(BLACK)
-        # Draw circles
-        for idx,(x,y) in self.circle_positions.items():
-            color = GRAY if self.board[idx] is None else RED if self.board[idx][0]==1 else GREEN
-            pygame.draw.circle(SCREEN, color, (x,y), 25)
-            if self.board[idx] is not None:
-                num_txt = FONT.render(str(self.board[idx][1]), True, WHITE)
-                SCREEN.blit(num_txt, (x - num_txt.get_width()//2, y - num_txt.get_height()//2))
-        # Highlight last placed
-        if self.last_placed is not None:
-            x,y = self.circle_positions[self.last_placed]
-            pygame.draw.circle(SCREEN, WHITE, (x,y), 28,3)
-        # Draw number panels
-        self.draw_number_panel(1, 500)
-        self.draw_number_panel(2, 50)
-        # Current player indicator
-        info = FONT.render(f"Player {self.current_player}'s turn", True, RED if self.current_player==1 else GREEN)
-        SCREEN.blit(info, (WIDTH//2 - info.get_width()//2, HEIGHT//2 - 20))
-
-    def draw_number_panel(self, player, y_offset):
-        x_start = 50
-        self.num_panels[player]=[]
-        for idx, num in enumerate(range(1,11)):
-            x = x_start + idx*70
-            color = GRAY if num not in self.available_numbers[player] else RED if player==1 else GREEN
-            rect = pygame.Rect(x, y_offset, 50,50)
-            pygame.draw.rect(SCREEN, color, rect)
-            num_txt = FONT.render(str(num), True, BLACK)
-            SCREEN.blit(num_txt, (x+25 - num_txt.get_width()//2, y_offset+25 - num_txt.get_height()//2))
-            self.num_panels[player].append((num, rect))
+        # AI time budget controls, same layout as the depth row
+        time_y = depth_y + 60
+        time_label = FONT.render("AI Time:", True, RED)
+        SCREEN.blit(time_label, (WIDTH//2 - 80, time_y + 10))
+
+        time_minus = pygame.Rect(WIDTH//2 - 10 - 80, time_y, 40, 40)
+        pygame.draw.rect(SCREEN, GRAY, time_minus)
+        SCREEN.blit(minus_txt, (time_minus.centerx - minus_txt.get_width()//2, time_minus.centery - minus_txt.get_height()//2))
+        self.main_menu_buttons.append(("time_minus", time_minus))
+
+        time_txt = FONT.render(f"{self.ai_time}s", True, RED)
+        time_box = pygame.Rect(WIDTH//2 - 10, time_y, 60, 40)
+        pygame.draw.rect(SCREEN, BLACK, time_box)
+        pygame.draw.rect(SCREEN, RED, time_box, 2)
+        SCREEN.blit(time_txt, (time_box.centerx - time_txt.get_width()//2, time_box.centery - time_txt.get_height()//2))
+
+        time_plus = pygame.Rect(WIDTH//2 + 70, time_y, 40, 40)
+        pygame.draw.rect(SCREEN, GRAY, time_plus)
+        SCREEN.blit(plus_txt, (time_plus.centerx - plus_txt.get_width()//2, time_plus.centery - plus_txt.get_height()//2))
+        self.main_menu_buttons.append(("time_plus", time_plus))
+
+        # pyramid size controls, same layout again
+        rows_y = time_y + 60
+        rows_label = FONT.render("Rows:", True, RED)
+        SCREEN.blit(rows_label, (WIDTH//2 - 80, rows_y + 10))
+
+        rows_minus = pygame.Rect(WIDTH//2 - 10 - 80, rows_y, 40, 40)
+        pygame.draw.rect(SCREEN, GRAY, rows_minus)
+        SCREEN.blit(minus_txt, (rows_minus.centerx - minus_txt.get_width()//2, rows_minus.centery - minus_txt.get_height()//2))
+        self.main_menu_buttons.append(("rows_minus", rows_minus))
+
+        rows_txt = FONT.render(str(self.rows), True, RED)
+        rows_box = pygame.Rect(WIDTH//2 - 10, rows_y, 60, 40)
+        pygame.draw.rect(SCREEN, BLACK, rows_box)
+        pygame.draw.rect(SCREEN, RED, rows_box, 2)
+        SCREEN.blit(rows_txt, (rows_box.centerx - rows_txt.get_width()//2, rows_box.centery - rows_txt.get_height()//2))
+
+        rows_plus = pygame.Rect(WIDTH//2 + 70, rows_y, 40, 40)
+        pygame.draw.rect(SCREEN, GRAY, rows_plus)
+        SCREEN.blit(plus_txt, (rows_plus.centerx - plus_txt.get_width()//2, rows_plus.centery - plus_txt.get_height()//2))
+        self.main_menu_buttons.append(("rows_plus", rows_plus))
+
+        # small helper text
+        hint = FONT.render("Use +/- to change AI max depth (1-6) and seconds per move (1-10)", True, WHITE)
+        SCREEN.blit(hint, (WIDTH//2 - hint.get_width()//2, rows_y + 60))
+        sizes = FONT.render(f"and the pyramid size: {self.geometry.cells} circles, numbers 1-{self.geometry.numbers[-1]}",
+                            True, WHITE)
+        SCREEN.blit(sizes, (WIDTH//2 - sizes.get_width()//2, rows_y + 60 + hint.get_height() + 5))
+        keys = FONT.render("Press I in a game to show the AI's search statistics", True, GRAY)
+        SCREEN.blit(keys, (WIDTH//2 - keys.get_width()//2, rows_y + 60 + 2*(hint.get_height() + 5)))
 
     def draw_gameover(self):
         SCREEN.fill(BLACK)
@@ -153,16 +240,30 @@ class Game:
                         # clamp minimum depth to 1
                         self.ai_depth = max(1, self.ai_depth - 1)
                     elif name=="depth_plus":
-                        # clamp maximum depth to 6 to avoid huge compute times
+                        # clamp maximum depth to 6; the time budget bounds each move
+                        # anyway (Black_hole_bench.py measures time to each depth)
                         self.ai_depth = min(6, self.ai_depth + 1)
+                    elif name=="engine":
+                        self.ai_engine = "minimax" if self.ai_engine == "mcts" else "mcts"
+                    elif name=="time_minus":
+                        self.ai_time = max(1, self.ai_time - 1)
+                    elif name=="time_plus":
+                        self.ai_time = min(10, self.ai_time + 1)
+                    elif name=="rows_minus":
+                        self.set_rows(max(MIN_ROWS, self.rows - 1))
+                    elif name=="rows_plus":
+                        self.set_rows(min(MAX_ROWS, self.rows + 1))
         elif self.state=="playing":
+            if self.ai_worker is not None:
+                return  # the AI's turn; wait for its move
             # Check number panel clicks
             for num,rect in self.num_panels[self.current_player]:
                 if rect.collidepoint(pos) and num in self.available_numbers[self.current_player]:
                     self.selected_number=num
             # Check board clicks
             for idx,(x,y) in self.circle_positions.items():
-                circle_rect = pygame.Rect(x-25,y-25,50,50)
+                r = self.radius
+                circle_rect = pygame.Rect(x-r,y-r,2*r,2*r)
                 if circle_rect.collidepoint(pos) and self.board[idx] is None and self.selected_number:
                     self.board[idx]=(self.current_player, self.selected_number)
                     self.available_numbers[self.current_player].remove(self.selected_number)
@@ -180,18 +281,97 @@ class Game:
                 self.state="menu"
 
     # --- AI Functions ---
-    def ai_move(self):
-        best_score = -math.inf
-        best_move = None
-        empties = [i for i,v in enumerate(self.board) if v is None]
-        for num in self.available_numbers[2]:
-            for idx in empties:
-                new_board = self.board.copy()
-                new_board[idx] = (2,num)
-                score = self.minimax(new_board, self.available_numbers[2]-{num}, self.available_numbers[1], self.ai_depth-1, False, -math.inf, math.inf)
-                if score > best_score:
-                    best_score = score
-                    best_move = (idx, num)
+    def start_ai(self):
+        # search in a separate process so the window keeps drawing
+        if self.ai_worker is not None:
+            return
+        if self.ai_engine == "mcts":
+            self.start_mcts()
+            return
+        self.ai_queue = mp.Queue()
+        self.ai_stop = mp.Event()
+        # a parallel search owns a process pool, so it cannot be a daemon
+        self.ai_worker = mp.Process(target=engine.think_worker,
+                                    args=(self.board, self.available_numbers, self.ai_depth,
+                                          EXACT_EMPTIES, self.tablebase_path, self.ai_queue,
+                                          TT_MEGABYTES, AI_WORKERS, self.ai_stop),
+                                    daemon=AI_WORKERS == 1)
+        self.ai_worker.start()
+        self.ai_started = time.time()
+        self.ai_best = None
+        self.ai_reached = 0
+        self.ai_stats = None
+
+    def start_mcts(self):
+        if self.mcts_process is None or not self.mcts_process.is_alive():
+            self.mcts_requests = mp.Queue()
+            self.mcts_out = mp.Queue()
+            self.mcts_process = mp.Process(target=mcts.mcts_worker,
+                                           args=(self.mcts_requests, self.mcts_out), daemon=True)
+            self.mcts_process.start()
+        self.mcts_request += 1
+        self.mcts_requests.put((self.mcts_request, self.board, self.available_numbers, self.ai_time))
+        self.ai_worker = self.mcts_process
+        self.ai_queue = self.mcts_out
+        self.ai_started = time.time()
+        self.ai_best = None
+        self.ai_reached = 0
+        self.ai_stats = None
+
+    def poll_ai(self):
+        # called every frame; plays the deepest move once the search ends or time is up
+        if self.ai_worker is None:
+            return
+        done = False
+        try:
+            while True:
+                msg = self.ai_queue.get_nowait()
+                if msg[0] == "depth":
+                    _, self.ai_reached, score, self.ai_best, hits, probes, self.ai_stats = msg
+                    self.ai_info = f"AI depth {self.ai_reached}, score {score:.1f}"
+                    if probes:
+                        self.ai_info += f", TT hits {hits / probes:.1%} of {probes}"
+                elif msg[0] == "mcts":
+                    if msg[1] != self.mcts_request:
+                        continue
+                    _, _, score, self.ai_best, self.ai_stats = msg
+                    self.ai_info = (f"AI MCTS, score {score:.1f}, {self.ai_stats['playouts']:,} playouts "
+                                    f"({self.ai_stats['playouts_per_sec']/1000:.1f}k/s)")
+                elif len(msg) > 1 and msg[1] != self.mcts_request:
+                    continue  # the end of an abandoned MCTS search
+                else:
+                    done = True
+        except queue.Empty:
+            pass
+        out_of_time = time.time() - self.ai_started >= self.ai_time
+        if done or (out_of_time and self.ai_best is not None):
+            move = self.ai_best
+            self.stop_ai()
+            self.ai_move(move)
+        elif not self.ai_worker.is_alive() and self.ai_queue.empty():
+            self.stop_ai()
+            self.ai_info = "AI stopped unexpectedly"
+
+    def stop_ai(self):
+        self.ai_retired = [p for p in self.ai_retired if p.is_alive()]
+        if self.ai_worker is None:
+            return
+        if self.ai_worker is self.mcts_process:
+            # keep the process and its tree; it stops at its own time budget
+            pass
+        elif AI_WORKERS > 1:
+            # let it shut its pool down; the root moves in progress stop at their next poll
+            self.ai_stop.set()
+            self.ai_retired.append(self.ai_worker)
+        else:
+            if self.ai_worker.is_alive():
+                self.ai_worker.terminate()
+            self.ai_worker.join()
+        self.ai_worker = None
+        self.ai_queue = None
+        self.ai_stop = None
+
+    def ai_move(self, best_move):
         if best_move:
             idx, num = best_move
             self.board[idx] = (2,num)
@@ -203,135 +383,228 @@ class Game:
                 return
             self.current_player = 1
 
-    def minimax(self, board, ai_nums, opp_nums, depth, maximizing, alpha, beta):
-        if depth==0 or all(v is not None for v in board[:-1]):
-            return self.evaluate_board(board)
-        empties = [i for i,v in enumerate(board) if v is None]
-        if maximizing:
-            max_eval = -math.inf
-            for num in ai_nums:
-                for idx in empties:
-                    new_board = board.copy()
-                    new_board[idx]=(2,num)
-                    eval = self.minimax(new_board, ai_nums-{num}, opp_nums, depth-1, False, alpha, beta)
-                    max_eval = max(max_eval, eval)
-                    alpha = max(alpha, eval)
-                    if beta <= alpha:
-                        break
-            return max_eval
-        else:
-            min_eval = math.inf
-            for num in opp_nums:
-                for idx in empties:
-                    new_board = board.copy()
-                    new_board[idx]=(1,num)
-                    eval = self.minimax(new_board, ai_nums, opp_nums-{num}, depth-1, True, alpha, beta)
-                    min_eval = min(min_eval, eval)
-                    beta = min(beta, eval)
-                    if beta <= alpha:
-                        break
-            return min_eval
-
     def evaluate_board(self, board):
-        black = next((i for i,v in enumerate(board) if v is None), None)
-        if black is None:
-            return 0
-        adj = self.get_adjacent(black)
-        scores = {1:0, 2:0}
-        for i in adj:
-            if board[i]:
-                player,num = board[i]
-                scores[player]+=num
-        return scores[1] - scores[2]
+        return engine.State.from_board(board).evaluate()
 
     # --- Game Logic ---
     def determine_winner(self):
-        black = self.board.index(None)
-        adj = self.get_adjacent(black)
-        scores = {1:0,2:0}
-        for i in adj:
-            if self.board[i]:
-                player,num = self.board[i]
-                scores[player]+=num
-        self.winner = 1 if scores[1]<scores[2] else 2
+        # rules live in the engine so they can be used without a display
+        self.winner = engine.State.from_board(self.board).winner()
         self.state="gameover"
 
     def get_adjacent(self, idx):
-        if idx==0:
-            return [1,2]
-        elif idx==1:
-            return [0,2,3,4]
-        elif idx==2:
-            return [0,1,4,5]
-        elif idx==3:
-            return [1,4,6,7]
-        elif idx==4:
-            return [1,2,3,5,7,8]
-        elif idx==5:
-            return [2,4,8,9]
-        elif idx==6:
-            return [3,7,10,11]
-        elif idx==7:
-            return [3,4,6,8,11,12]
-        elif idx==8:
-            return [4,5,7,9,12,13]
-        elif idx==9:
-            return [5,8,13,14]
-        elif idx==10:
-            return [6,11,15,16]
-        elif idx==11:
-            return [6,7,10,12,16,17]
-        elif idx==12:
-            return [7,8,11,13,17,18]
-        elif idx==13:
-            return [8,9,12,14,18,19]
-        elif idx==14:
-            return [9,13,19,20]
-        elif idx==15:
-            return [10,16]
-        elif idx==16:
-            return [10,11,15,17]
-        elif idx==17:
-            return [11,12,16,18]
-        elif idx==18:
-            return [12,13,17,19]
-        elif idx==19:
-            return [13,14,18,20]
-        elif idx==20:
-            return [14,19]
+        return list(self.geometry.neighbours[idx])
 
     def reset_game(self):
-        self.board = [None]*21
+        self.board = [None]*self.geometry.cells
         self.current_player=1
         self.last_placed=None
-        self.available_numbers={1:set(range(1,11)), 2:set(range(1,11))}
+        self.available_numbers={1:set(self.geometry.numbers), 2:set(self.geometry.numbers)}
         self.selected_number=None
         self.winner=None
-        self.num_panels={1:[],2:[]}
+        self.stop_ai()
+        self.ai_info=""
+        self.ai_stats=None
+
+class Renderer:
+    """Draws the game from cached surfaces, and only when something changed.
+
+    Number glyphs are rendered once per colour and the empty pyramid and
+    full number panels form a static background layer, rebuilt when the
+    pyramid size changes. Every frame each
+    region of the playing screen (circle, panel square, text line) reports
+    a small signature of what it shows. Only when one differs from what is
+    on the display is the frame composed again, and only the changed
+    regions are pushed with pygame.display.update(rects). An idle board
+    costs an event poll per frame. Menu and game-over screens are redrawn
+    whole when their contents change."""
+
+    def __init__(self, game):
+        self.game = game
+        self.glyphs = {}
+        for num in engine.pyramid(MAX_ROWS).numbers:
+            self.glyph(str(num), WHITE)
+            self.glyph(str(num), BLACK)
+        self.background = self.build_background()
+        self.layout = game.rows
+        self.screen_sig = None
+        self.shown = {}
+        # seconds spent drawing each frame that drew anything
+        self.frame_times = deque(maxlen=10000)
+        self.frames = 0
+
+    def glyph(self, text, colour, font=None):
+        font = font or FONT
+        key = (text, colour, id(font))
+        surf = self.glyphs.get(key)
+        if surf is None:
+            surf = self.glyphs[key] = font.render(text, True, colour)
+        return surf
+
+    def blit_centered(self, surf, center):
+        SCREEN.blit(surf, (center[0] - surf.get_width()//2, center[1] - surf.get_height()//2))
+
+    def build_background(self):
+        # what the playing screen shows before any move
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        layer.fill(BLACK)
+        for x, y in self.game.circle_positions.values():
+            pygame.draw.circle(layer, GRAY, (x,y), self.game.radius)
+        for player, panel in self.game.num_panels.items():
+            for num, rect in panel:
+                pygame.draw.rect(layer, RED if player==1 else GREEN, rect)
+                surf = self.glyph(str(num), BLACK)
+                layer.blit(surf, (rect.centerx - surf.get_width()//2, rect.centery - surf.get_height()//2))
+        return layer
+
+    def regions(self):
+        # (name, rect, signature) for everything on the playing screen that can change
+        g = self.game
+        r = g.radius + 5
+        for idx, (x, y) in g.circle_positions.items():
+            yield ("circle", idx), pygame.Rect(x-r, y-r, 2*r, 2*r), (g.board[idx], idx == g.last_placed)
+        for player, panel in g.num_panels.items():
+            for num, rect in panel:
+                yield ("panel", player, num), rect, num in g.available_numbers[player]
+        yield "turn", pygame.Rect(0, HEIGHT//2 - 20, WIDTH, 30), g.current_player
+        thinking = None
+        if g.ai_worker is not None:
+            # thinking indicator: animated dots plus the depth finished (or playouts run) so far
+            dots = "." * (int(time.time() * 3) % 4)
+            elapsed = time.time() - g.ai_started
+            if g.ai_worker is g.mcts_process:
+                playouts = g.ai_stats["playouts"] if g.ai_stats else 0
+                thinking = f"AI thinking{dots:<3} {playouts:,} playouts, {elapsed:.1f}s"
+            else:
+                thinking = f"AI thinking{dots:<3} depth {g.ai_reached}, {elapsed:.1f}s"
+        yield "thinking", pygame.Rect(0, HEIGHT//2 + 10, WIDTH, 30), thinking
+        yield "ai_info", pygame.Rect(0, 600, WIDTH, 30), g.ai_info if g.vs_ai else ""
+        stats = None
+        if g.show_stats and g.vs_ai:
+            s = g.ai_stats
+            if s is not None and "playouts" in s:
+                stats = (f"MCTS: {s['playouts']:,} playouts, {s['playouts_per_sec']/1000:.1f}k/s, "
+                         f"{s['nodes']:,} new nodes, {s['reused']:,} kept, {s['seconds']:.2f}s")
+            else:
+                stats = "AI stats: no move yet" if s is None else (
+                    f"depth {s['depth']}: {s['nodes']:,} nodes, {s['leaves']:,} leaves, "
+                    f"{s['cutoffs']:,} cutoffs, {s['seconds']:.2f}s, "
+                    f"{s['nodes_per_sec']/1000:.0f}k/s, EBF {s['ebf']:.1f}")
+        yield "stats", pygame.Rect(0, 570, WIDTH, 30), stats
+
+    def draw_playing(self, sigs):
+        g = self.game
+        SCREEN.blit(self.background, (0, 0))
+        for idx, (x, y) in g.circle_positions.items():
+            slot = g.board[idx]
+            if slot is not None:
+                pygame.draw.circle(SCREEN, RED if slot[0]==1 else GREEN, (x,y), g.radius)
+                self.blit_centered(self.glyph(str(slot[1]), WHITE), (x, y))
+        # Highlight last placed
+        if g.last_placed is not None:
+            x,y = g.circle_positions[g.last_placed]
+            pygame.draw.circle(SCREEN, WHITE, (x,y), g.radius + 3,3)
+        for player, panel in g.num_panels.items():
+            for num, rect in panel:
+                if num not in g.available_numbers[player]:
+                    pygame.draw.rect(SCREEN, GRAY, rect)
+                    self.blit_centered(self.glyph(str(num), BLACK), rect.center)
+        # Current player indicator
+        turn = self.glyph(f"Player {g.current_player}'s turn", RED if g.current_player==1 else GREEN)
+        self.blit_centered(turn, (WIDTH//2, HEIGHT//2 - 20 + turn.get_height()//2))
+        if sigs["thinking"]:
+            # rendered directly: the text changes every tenth of a second
+            think = FONT.render(sigs["thinking"], True, GREEN)
+            self.blit_centered(think, (WIDTH//2, HEIGHT//2 + 10 + think.get_height()//2))
+        if sigs["ai_info"]:
+            info = FONT.render(sigs["ai_info"], True, GRAY)
+            self.blit_centered(info, (WIDTH//2, 600 + info.get_height()//2))
+        if sigs["stats"]:
+            stats = FONT.render(sigs["stats"], True, WHITE)
+            self.blit_centered(stats, (WIDTH//2, 570 + stats.get_height()//2))
+
+    def draw(self):
+        """Bring the display up to date; returns True if anything was drawn."""
+        g = self.game
+        self.frames += 1
+        start = time.perf_counter()
+        if g.state != "playing":
+            sig = (g.state, g.ai_depth, g.ai_engine, g.ai_time, g.rows, g.winner)
+            if sig == self.screen_sig:
+                return False
+            if g.state=="menu":
+                g.draw_menu()
+            else:
+                g.draw_gameover()
+            pygame.display.flip()
+            self.screen_sig = sig
+            self.shown = {}
+        else:
+            if self.layout != g.rows:
+                self.background = self.build_background()
+                self.layout = g.rows
+                self.screen_sig = None
+            regions = list(self.regions())
+            sigs = {name: sig for name, _, sig in regions}
+            if self.screen_sig == "playing":
+                dirty = [rect for name, rect, sig in regions if self.shown.get(name) != sig]
+                if not dirty:
+                    return False
+            self.draw_playing(sigs)
+            if self.screen_sig == "playing":
+                pygame.display.update(dirty)
+            else:
+                pygame.display.flip()
+            self.screen_sig = "playing"
+            self.shown = sigs
+        self.frame_times.append(time.perf_counter() - start)
+        return True
+
+    def report(self):
+        times = sorted(self.frame_times)
+        if not times:
+            return f"frames: 0 of {self.frames} drawn"
+        mean = sum(times) / len(times)
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        return (f"frames: {len(times)} of {self.frames} drawn, {mean*1000:.2f} ms mean, "
+                f"{p95*1000:.2f} ms p95, {times[-1]*1000:.2f} ms max")
 
 # --- Main Loop ---
-game = Game()
-running = True
-while running:
-    CLOCK.tick(30)
-    for event in pygame.event.get():
-        if event.type==pygame.QUIT:
-            running=False
-        elif event.type==pygame.MOUSEBUTTONDOWN:
-            game.handle_click(event.pos)
-        elif event.type==pygame.USEREVENT:
-            if game.vs_ai and game.current_player==2 and game.state=="playing":
-                game.ai_move()
-                pygame.time.set_timer(pygame.USEREVENT,0)
-
-    if game.state=="menu":
-        game.draw_menu()
-    elif game.state=="playing":
-        game.draw_board()
-    elif game.state=="gameover":
-        game.draw_gameover()
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+if __name__ == "__main__":
+    # display set up here so AI worker processes can import this module safely
+    pygame.init()
+    SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Black Hole Pyramid")
+    CLOCK = pygame.time.Clock()
+    FONT = pygame.font.SysFont("Consolas", 20)
+    BIGFONT = pygame.font.SysFont("Consolas", 40)
+
+    game = Game()
+    renderer = Renderer(game)
+    running = True
+    while running:
+        CLOCK.tick(30)
+        for event in pygame.event.get():
+            if event.type==pygame.QUIT:
+                running=False
+            elif event.type==pygame.MOUSEBUTTONDOWN:
+                game.handle_click(event.pos)
+            elif event.type==pygame.KEYDOWN and event.key==pygame.K_i:
+                game.show_stats = not game.show_stats
+            elif event.type==pygame.USEREVENT:
+                if game.vs_ai and game.current_player==2 and game.state=="playing":
+                    game.start_ai()
+                    pygame.time.set_timer(pygame.USEREVENT,0)
+        game.poll_ai()
+        renderer.draw()
+
+    # quitting mid-search just ends the worker
+    game.stop_ai()
+    for worker in game.ai_retired:
+        worker.join()
+    if game.mcts_process is not None:
+        game.mcts_requests.put(None)
+        game.mcts_process.join()
+    print(renderer.report())
+    pygame.quit()
+    sys.exit()
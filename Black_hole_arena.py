@@ -0,0 +1,186 @@
+"""
+Black Hole Pyramid self-play arena
+----------------------------------
+Plays AI settings against each other headlessly on a process pool, with
+no pygame involved, and reports each pairing's win rates (overall and by
+seat) and every setting's per-move think-time distribution.
+
+Player settings:
+    random       a random legal placement
+    minimax:D    the original two-sided minimax, depth D
+    negamax:D    the game's AI: negamax, depth D, exact search near the end
+    mcts:MS      Monte Carlo Tree Search, MS milliseconds per move
+
+Every pair plays the same number of games in each seat. Each game opens
+with a few random placements so deterministic players don't repeat one
+game.
+
+Example:
+    python Black_hole_arena.py negamax:3 negamax:2 minimax:2 random --games 1000
+    python Black_hole_arena.py mcts:200 negamax:3 --games 200
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import Black_hole_engine as engine
+import Black_hole_mcts as mcts
+from Bench_report import fmt, percentile
+
+KINDS = ("random", "minimax", "negamax", "mcts")
+
+
+def parse_player(spec):
+    """'kind' or 'kind:depth' -> (kind, depth); for mcts the number is a
+    time budget in milliseconds."""
+    kind, _, depth = spec.partition(":")
+    if kind not in KINDS:
+        raise ValueError(f"unknown player kind {kind!r} (expected one of {', '.join(KINDS)})")
+    if kind == "random":
+        return kind, 0
+    if not depth.isdigit() or int(depth) < 1:
+        example = "mcts:200" if kind == "mcts" else f"{kind}:3"
+        raise ValueError(f"{spec!r}: give a search {'time' if kind == 'mcts' else 'depth'}, e.g. {example}")
+    return kind, int(depth)
+
+
+def choose_move(player, state, rng, exact_empties, tt_megabytes):
+    kind, depth = player
+    if kind == "random":
+        return rng.choice(state.legal_moves())
+    if kind == "minimax":
+        return engine.minimax_search(state, depth)[1]
+    if kind == "mcts":
+        return mcts.MCTS(rng.getrandbits(32)).search(state, depth / 1000)[1]
+    return engine.best_move(state, depth, engine.TranspositionTable(tt_megabytes), exact_empties)
+
+
+def play_game(args):
+    """One game; returns (winner seat, player 1 sum - player 2 sum, think
+    seconds per move for seat 1, for seat 2)."""
+    specs, seed, random_moves, exact_empties, tt_megabytes, rows = args
+    players = (None,) + tuple(parse_player(spec) for spec in specs)
+    rng = random.Random(seed)
+    state = engine.State(rows)
+    times = (None, [], [])
+    while not state.is_over():
+        seat = state.to_move
+        if state.geo.cells - state.empty_count < random_moves:
+            move = rng.choice(state.legal_moves())
+        else:
+            start = perf_counter()
+            move = choose_move(players[seat], state, rng, exact_empties, tt_megabytes)
+            times[seat].append(perf_counter() - start)
+        state.place(*move)
+    sums = state.hole_sums()
+    return state.winner(), sums[1] - sums[2], times[1], times[2]
+
+
+def run(specs, games, workers=None, seed=None, random_moves=2, exact_empties=8,
+        tt_megabytes=8, rows=6, log=sys.stderr):
+    """Round robin over specs, `games` games per pair split evenly between
+    seats. Returns a JSON-ready dict of pairings and think times (ms)."""
+    rng = random.Random(seed)
+    jobs, labels = [], []
+    for a, b in itertools.combinations(specs, 2):
+        for g in range(games):
+            seats = (a, b) if g % 2 == 0 else (b, a)
+            jobs.append((seats, rng.getrandbits(32), random_moves, exact_empties, tt_megabytes, rows))
+            labels.append((a, b))
+    pairings = {}
+    think = {spec: [] for spec in specs}
+    start = time.time()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(play_game, jobs, chunksize=max(1, len(jobs) // (workers * 8)))
+        for done, (job, pair, (winner, margin, times1, times2)) in enumerate(zip(jobs, labels, results), 1):
+            seats = job[0]
+            rec = pairings.setdefault(f"{pair[0]} vs {pair[1]}", {
+                "players": list(pair), "games": 0, "wins": {pair[0]: 0, pair[1]: 0},
+                "wins_as_p1": {pair[0]: 0, pair[1]: 0}, "games_as_p1": {pair[0]: 0, pair[1]: 0},
+                "margin_total": 0})
+            rec["games"] += 1
+            rec["games_as_p1"][seats[0]] += 1
+            rec["wins"][seats[winner - 1]] += 1
+            if winner == 1:
+                rec["wins_as_p1"][seats[0]] += 1
+            # margin from the first player of the pair's point of view (lower sum wins)
+            rec["margin_total"] += -margin if seats[0] == pair[0] else margin
+            think[seats[0]].extend(times1)
+            think[seats[1]].extend(times2)
+            if log is not None and done % 200 == 0:
+                print(f"{done}/{len(jobs)} games, {time.time() - start:.0f}s", file=log)
+    summary = {}
+    for spec, times in think.items():
+        ms = sorted(t * 1000 for t in times)
+        summary[spec] = {
+            "moves": len(ms),
+            "mean_ms": sum(ms) / len(ms) if ms else None,
+            "p50_ms": percentile(ms, 50),
+            "p90_ms": percentile(ms, 90),
+            "p99_ms": percentile(ms, 99),
+            "max_ms": ms[-1] if ms else None,
+        }
+    return {"meta": {"games_per_pair": games, "rows": rows, "random_moves": random_moves,
+                     "exact_empties": exact_empties, "seed": seed,
+                     "seconds": round(time.time() - start, 2)},
+            "pairings": pairings, "think_time": summary}
+
+
+def print_report(result):
+    for name, rec in result["pairings"].items():
+        a, b = rec["players"]
+        rate = rec["wins"][a] / rec["games"]
+        p1 = rec["wins_as_p1"][a] / rec["games_as_p1"][a] if rec["games_as_p1"][a] else 0.0
+        p2_games = rec["games"] - rec["games_as_p1"][a]
+        p2 = (rec["wins"][a] - rec["wins_as_p1"][a]) / p2_games if p2_games else 0.0
+        print(f"{name:<28} {a} wins {rate:6.1%} (as P1 {p1:6.1%}, as P2 {p2:6.1%}), "
+              f"mean margin {rec['margin_total'] / rec['games']:+.2f}, {rec['games']} games")
+    print()
+    print(f"{'player':<14}{'moves':>8}{'mean ms':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>10}")
+    for spec, t in result["think_time"].items():
+        print(f"{spec:<14}{t['moves']:>8}{fmt(t['mean_ms'], 10, 2)}{fmt(t['p50_ms'], 9, 2)}"
+              f"{fmt(t['p90_ms'], 9, 2)}{fmt(t['p99_ms'], 9, 2)}{fmt(t['max_ms'], 10, 2)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Black Hole AI settings against each other.")
+    parser.add_argument("players", nargs="+", help="player settings, e.g. negamax:3 minimax:2 mcts:200 random")
+    parser.add_argument("--games", type=int, default=1000, help="games per pair of players")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--random-moves", type=int, default=2,
+                        help="random placements opening each game")
+    parser.add_argument("--exact", type=int, default=8,
+                        help="negamax searches to the end from this many empty circles")
+    parser.add_argument("--tt-mb", type=float, default=8, help="transposition table per negamax move")
+    parser.add_argument("--rows", type=int, default=6, help=f"pyramid rows (2-{engine.MAX_ROWS})")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    args = parser.parse_args(argv)
+    if not 2 <= args.rows <= engine.MAX_ROWS:
+        parser.error(f"--rows must be between 2 and {engine.MAX_ROWS}")
+    if len(set(args.players)) < 2:
+        parser.error("give at least two different player settings")
+    for spec in args.players:
+        try:
+            parse_player(spec)
+        except ValueError as e:
+            parser.error(str(e))
+    result = run(list(dict.fromkeys(args.players)), args.games, args.workers, args.seed,
+                 args.random_moves, args.exact, args.tt_mb, args.rows)
+    print_report(result)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Black Hole AI benchmark
+-----------------------
+Searches a fixed set of mid-game positions headlessly, depth by depth, and
+records for every depth reached: time to depth, nodes, leaf evaluations,
+beta cutoffs and the effective branching factor, plus each position's
+nodes per second. Results can be written as JSON and compared against a
+saved baseline; regressions make the exit status 1.
+
+Engines:
+    negamax   the game's AI: iterative deepening, one table and Negamax for
+              all depths, so time to depth d includes depths 1..d-1
+    minimax   the original two-sided minimax, a fresh search per depth; slow
+              (minutes at depth 4 on the 8-row positions), so only on request
+
+Examples:
+    python Black_hole_bench.py --save baseline.json
+    python Black_hole_bench.py --baseline baseline.json --max-depth 5
+    python Black_hole_bench.py --engines negamax minimax --only 6r-7a 6r-9a
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+from time import perf_counter
+
+import Black_hole_engine as engine
+from Bench_report import fmt
+
+# (name, pyramid rows, pieces placed, seed): engine.random_state(Random(seed),
+# placed, rows) rebuilds each position; odd counts leave player 2, the AI, to move
+POSITIONS = (
+    ("6r-5a", 6, 5, 101),
+    ("6r-5b", 6, 5, 102),
+    ("6r-7a", 6, 7, 103),
+    ("6r-7b", 6, 7, 104),
+    ("6r-9a", 6, 9, 105),
+    ("6r-9b", 6, 9, 106),
+    ("6r-11a", 6, 11, 107),
+    ("6r-11b", 6, 11, 108),
+    ("8r-9", 8, 9, 109),
+    ("8r-15", 8, 15, 110),
+)
+
+ENGINES = ("negamax", "minimax")
+
+# depths finished faster than this are too noisy to compare times of
+MIN_COMPARE_MS = 5.0
+
+
+def load_position(name):
+    for pos_name, rows, placed, seed in POSITIONS:
+        if pos_name == name:
+            return engine.random_state(random.Random(seed), placed, rows)
+    raise KeyError(name)
+
+
+def run_position(name, kind, max_depth, time_limit=30.0, tt_megabytes=32):
+    """Search one position to max_depth, starting no new depth once
+    time_limit seconds have passed. Returns a summary dict (times in ms)."""
+    state = load_position(name)
+    depths = []
+    total_nodes = 0
+    total_secs = 0.0
+    if kind == "negamax":
+        tt = engine.TranspositionTable(tt_megabytes)
+        negamax = engine.Negamax(tt)
+    for depth in range(1, min(max_depth, state.empty_count - 1) + 1):
+        if total_secs > time_limit:
+            break
+        state.nodes = 0
+        start = perf_counter()
+        if kind == "negamax":
+            leaves, cutoffs = negamax.leaves, negamax.cutoffs
+            score, move = negamax.search(state, depth)
+            leaves, cutoffs = negamax.leaves - leaves, negamax.cutoffs - cutoffs
+            elapsed = perf_counter() - start
+            total_secs += elapsed
+            time_to_depth = total_secs
+        else:
+            score, move = engine.minimax_search(state, depth, engine.TranspositionTable(tt_megabytes))
+            leaves = cutoffs = None  # not counted by minimax
+            elapsed = perf_counter() - start
+            total_secs += elapsed
+            time_to_depth = elapsed
+        total_nodes += state.nodes
+        depths.append({
+            "depth": depth,
+            "time_to_depth_ms": time_to_depth * 1000,
+            "nodes": state.nodes,
+            "leaves": leaves,
+            "cutoffs": cutoffs,
+            "ebf": engine.branching_factor(state.nodes, depth),
+            "score": score,
+            "move": list(move),
+        })
+    return {
+        "depths": depths,
+        "nodes_per_sec": total_nodes / total_secs if total_secs else None,
+    }
+
+
+def run(engines, positions, max_depth, time_limit=30.0, tt_megabytes=32, log=None):
+    results = {}
+    for kind in engines:
+        results[kind] = {}
+        for name in positions:
+            summary = run_position(name, kind, max_depth, time_limit, tt_megabytes)
+            results[kind][name] = summary
+            if log:
+                log(kind, name, summary)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "max_depth": max_depth,
+            "time_limit_s": time_limit,
+            "tt_megabytes": tt_megabytes,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.10):
+    """List of regression messages: a depth reached later or with more nodes
+    than the baseline by more than tolerance, a depth the baseline reached
+    but this run did not, or lower nodes per second."""
+    regressions = []
+    for kind, positions in current["results"].items():
+        for name, now in positions.items():
+            before = baseline.get("results", {}).get(kind, {}).get(name)
+            if before is None:
+                continue
+            reached = {d["depth"]: d for d in now["depths"]}
+            for old in before["depths"]:
+                new = reached.get(old["depth"])
+                label = f"{kind}/{name} depth {old['depth']}"
+                if new is None:
+                    regressions.append(f"{label}: not reached")
+                    continue
+                for key in ("time_to_depth_ms", "nodes"):
+                    if key == "time_to_depth_ms" and old[key] < MIN_COMPARE_MS:
+                        continue
+                    if old[key] and new[key] > old[key] * (1 + tolerance):
+                        regressions.append(f"{label}: {key} {old[key]:.1f} -> {new[key]:.1f} "
+                                           f"(+{(new[key] / old[key] - 1) * 100:.0f}%)")
+            old, new = before.get("nodes_per_sec"), now.get("nodes_per_sec")
+            if old and new and new < old / (1 + tolerance):
+                regressions.append(f"{kind}/{name}: nodes_per_sec {old:.0f} -> {new:.0f} "
+                                   f"({(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _fmt(value, width, digits=0):
+    # node and cutoff counts run to millions; group their digits
+    return fmt(value, width, digits, grouping=True)
+
+
+def print_rows(kind, name, summary):
+    for d in summary["depths"]:
+        print(f"{kind:<9}{name:<8}{d['depth']:>6}{_fmt(d['time_to_depth_ms'], 12, 1)}"
+              f"{_fmt(d['nodes'], 13)}{_fmt(d['leaves'], 13)}{_fmt(d['cutoffs'], 11)}"
+              f"{_fmt(d['ebf'], 7, 2)}")
+    print(f"{kind:<9}{name:<8}{'all':>6}{'':>12}{'':>13}{'':>13}{'':>11}{'':>7}"
+          f"{_fmt(summary['nodes_per_sec'], 12)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Black Hole AI search.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["negamax"])
+    parser.add_argument("--only", nargs="+", metavar="POSITION", help="run only these positions")
+    parser.add_argument("--max-depth", type=int, default=4, help="deepest search per position")
+    parser.add_argument("--time-limit", type=float, default=30.0,
+                        help="seconds per position after which no new depth starts")
+    parser.add_argument("--tt-mb", type=float, default=32, help="transposition table budget in MB")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against saved JSON results")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before flagging a regression (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    positions = [name for name, *_ in POSITIONS]
+    if args.only:
+        missing = set(args.only) - set(positions)
+        if missing:
+            parser.error(f"unknown position: {', '.join(sorted(missing))}")
+        positions = [name for name in positions if name in args.only]
+
+    print(f"{'engine':<9}{'pos':<8}{'depth':>6}{'ms to depth':>12}{'nodes':>13}{'leaves':>13}"
+          f"{'cutoffs':>11}{'EBF':>7}{'nodes/s':>12}")
+    current = run(args.engines, positions, args.max_depth, args.time_limit, args.tt_mb,
+                  log=print_rows)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for msg in regressions:
+            print(f"REGRESSION {msg}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,823 @@
+"""
+Black Hole Pyramid engine
+-------------------------
+Compact game state for the AI search, with no pygame dependency.
+
+- The circles are numbered row by row from the apex. pyramid(rows) builds
+  the adjacency, mirror and number tables of a board size once; the
+  classic 6-row board has 21 circles and numbers 1-10, and up to 9 rows
+  (45 circles, numbers 1-22) are supported. A State carries its tables
+  as `geo`.
+- `occupied` is a bit mask of filled circles.
+- values[player][cell] holds the number that player put on the cell
+  (0 if none), one flat list per player.
+- available[player] is a bitmask of numbers still in hand (bit n = n).
+- place()/unplace() change the state in place, so the search never copies
+  a board.
+- `key` is a Zobrist hash of the (cell, player, number) placements plus
+  the side to move. It does not depend on the order the pieces went down,
+  so every permutation of the same placements shares one
+  TranspositionTable entry. `mirror_key` hashes the mirror image; the two
+  are equal when the position is left-right symmetric.
+- around[cell] is the (player 1 - player 2) sum of cell's neighbours and
+  hole_total its sum over the empty circles, both kept up to date by
+  place()/unplace(), so scoring a leaf costs nothing extra.
+- `nodes` counts place() calls, the node count of any search run on it.
+
+Scores follow the game: once one circle is left empty (the black hole),
+each player sums their numbers adjacent to it and the lower sum wins. The
+AI plays player 2 and maximises (player 1 sum - player 2 sum).
+
+Negamax is the search engine: fail-soft alpha-beta over one flat move list
+per node, with interchangeable circles merged, killer/history ordering and
+the pyramid's mirror symmetry. minimax is the earlier two-sided search,
+kept for comparison (`python Black_hole_engine.py` prints both node
+counts).
+
+With at most `exact_empties` empty circles left, best_move searches to the
+end of the game instead of to a fixed depth, so its scores are exact. A
+tablebase (see Black_hole_tablebase) answers positions it holds directly.
+"""
+
+import argparse
+import math
+import random
+import sys
+from collections import namedtuple
+from time import perf_counter
+
+# the classic board has 6 rows; larger pyramids take up to MAX_ROWS
+MAX_ROWS = 9
+
+
+class Pyramid(namedtuple("Pyramid", "rows cells neighbours neighbour_masks mirror numbers "
+                                    "full_mask all_numbers")):
+    __slots__ = ()
+
+    def __reduce__(self):
+        # pickled as its row count, so search processes share one copy per size
+        return pyramid, (self.rows,)
+
+
+_PYRAMIDS = {}
+
+
+def pyramid(rows=6):
+    """Tables for a pyramid of `rows` rows, built once per size and shared.
+
+    Circle (r, c) touches (r, c - 1) and (r, c + 1) in its row, (r - 1, c - 1)
+    and (r - 1, c) above it and (r + 1, c) and (r + 1, c + 1) below. Each
+    player holds the numbers 1..cells // 2, so the classic 21 circles take
+    1-10 and 9 rows 1-22."""
+    if rows in _PYRAMIDS:
+        return _PYRAMIDS[rows]
+    if not 2 <= rows <= MAX_ROWS:
+        raise ValueError(f"a pyramid has 2 to {MAX_ROWS} rows, not {rows}")
+    index = {(r, c): r * (r + 1) // 2 + c for r in range(rows) for c in range(r + 1)}
+    neighbours = tuple(
+        tuple(sorted(index[rc] for rc in ((r, c - 1), (r, c + 1), (r - 1, c - 1), (r - 1, c),
+                                          (r + 1, c), (r + 1, c + 1)) if rc in index))
+        for r, c in index)
+    cells = len(index)
+    numbers = tuple(range(1, cells // 2 + 1))
+    geo = _PYRAMIDS[rows] = Pyramid(
+        rows=rows,
+        cells=cells,
+        neighbours=neighbours,
+        neighbour_masks=tuple(sum(1 << i for i in around) for around in neighbours),
+        # left-right reflection: row r, column c <-> row r, column r - c
+        mirror=tuple(index[r, r - c] for r, c in index),
+        numbers=numbers,
+        full_mask=(1 << cells) - 1,
+        all_numbers=sum(1 << n for n in numbers),
+    )
+    return geo
+
+
+def rows_for(cells):
+    """Row count of the pyramid with `cells` circles."""
+    rows = (math.isqrt(8 * cells + 1) - 1) // 2
+    if rows * (rows + 1) // 2 != cells:
+        raise ValueError(f"{cells} circles do not form a pyramid")
+    return rows
+
+
+# tables of the classic 6-row board
+_CLASSIC = pyramid(6)
+N_CELLS = _CLASSIC.cells
+NEIGHBOURS = _CLASSIC.neighbours
+MIRROR = _CLASSIC.mirror
+NEIGHBOUR_MASKS = _CLASSIC.neighbour_masks
+FULL_MASK = _CLASSIC.full_mask
+NUMBERS = _CLASSIC.numbers
+ALL_NUMBERS = _CLASSIC.all_numbers
+
+# largest board: hash keys, killer and history tables are sized for it
+MAX_CELLS = MAX_ROWS * (MAX_ROWS + 1) // 2
+MAX_NUMBER = MAX_CELLS // 2
+
+# fixed seed: keys (and so table behaviour) are the same on every run
+_rng = random.Random(0x8B1AC4)
+ZOBRIST = (None,) + tuple(
+    tuple(tuple(_rng.getrandbits(64) for _ in range(MAX_NUMBER + 1)) for _ in range(MAX_CELLS))
+    for _ in (1, 2)
+)
+SIDE_KEY = _rng.getrandbits(64)  # xor-ed in while player 2 is to move
+del _rng
+
+# history table row length: numbers 0..MAX_NUMBER
+_STRIDE = MAX_NUMBER + 1
+
+# bound types of a stored value
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class State:
+    __slots__ = ("occupied", "values", "available", "to_move", "empty_count", "key",
+                 "mirror_key", "around", "hole_total", "nodes", "geo")
+
+    def __init__(self, rows=6):
+        geo = self.geo = pyramid(rows)
+        cells = geo.cells
+        self.occupied = 0
+        self.values = (None, [0] * cells, [0] * cells)  # indexed by player
+        self.available = [0, geo.all_numbers, geo.all_numbers]
+        self.to_move = 1
+        self.empty_count = cells
+        self.key = 0
+        self.mirror_key = 0
+        self.around = [0] * cells
+        self.hole_total = 0
+        self.nodes = 0
+
+    @classmethod
+    def from_board(cls, board, available_numbers=None, to_move=None):
+        """Build from the UI representation: board is a list of (player, num) or
+        None per cell, available_numbers maps player -> set of numbers. The
+        pyramid size follows from len(board). Left out, the hands are the
+        numbers not on the board and the side to move follows from the
+        number of pieces placed."""
+        state = cls(rows_for(len(board)))
+        geo = state.geo
+        if available_numbers is None:
+            available_numbers = {p: set(geo.numbers) - {slot[1] for slot in board if slot and slot[0] == p}
+                                 for p in (1, 2)}
+        if to_move is None:
+            to_move = 1 + (geo.cells - board.count(None)) % 2
+        for cell, slot in enumerate(board):
+            if slot is not None:
+                player, num = slot
+                state.occupied |= 1 << cell
+                state.values[player][cell] = num
+                state.empty_count -= 1
+                state.key ^= ZOBRIST[player][cell][num]
+                state.mirror_key ^= ZOBRIST[player][geo.mirror[cell]][num]
+        for player in (1, 2):
+            state.available[player] = sum(1 << n for n in available_numbers[player])
+        state.to_move = to_move
+        if to_move == 2:
+            state.key ^= SIDE_KEY
+            state.mirror_key ^= SIDE_KEY
+        v1, v2 = state.values[1], state.values[2]
+        for cell, around in enumerate(geo.neighbours):
+            state.around[cell] = sum(v1[i] - v2[i] for i in around)
+        state.hole_total = sum(state.around[cell] for cell in state.empty_cells())
+        return state
+
+    def place(self, cell, num):
+        p = self.to_move
+        signed = num if p == 1 else -num
+        around = self.around
+        occupied = self.occupied
+        geo = self.geo
+        for i in geo.neighbours[cell]:
+            around[i] += signed
+            if not occupied >> i & 1:
+                self.hole_total += signed
+        self.hole_total -= around[cell]
+        self.occupied = occupied | 1 << cell
+        self.values[p][cell] = num
+        self.available[p] &= ~(1 << num)
+        self.empty_count -= 1
+        self.key ^= ZOBRIST[p][cell][num] ^ SIDE_KEY
+        self.mirror_key ^= ZOBRIST[p][geo.mirror[cell]][num] ^ SIDE_KEY
+        self.to_move = 3 - p
+        self.nodes += 1
+
+    def unplace(self, cell):
+        # undo the most recent place() on cell
+        p = 3 - self.to_move
+        num = self.values[p][cell]
+        signed = num if p == 1 else -num
+        around = self.around
+        occupied = self.occupied & ~(1 << cell)
+        geo = self.geo
+        for i in geo.neighbours[cell]:
+            around[i] -= signed
+            if not occupied >> i & 1:
+                self.hole_total -= signed
+        self.hole_total += around[cell]
+        self.occupied = occupied
+        self.values[p][cell] = 0
+        self.available[p] |= 1 << num
+        self.empty_count += 1
+        self.key ^= ZOBRIST[p][cell][num] ^ SIDE_KEY
+        self.mirror_key ^= ZOBRIST[p][geo.mirror[cell]][num] ^ SIDE_KEY
+        self.to_move = p
+
+    def is_over(self):
+        return self.empty_count == 1
+
+    def empty_cells(self):
+        free = ~self.occupied & self.geo.full_mask
+        cells = []
+        while free:
+            low = free & -free
+            cells.append(low.bit_length() - 1)
+            free ^= low
+        return cells
+
+    def numbers(self, player):
+        avail = self.available[player]
+        return [n for n in self.geo.numbers if avail >> n & 1]
+
+    def first_empty(self):
+        free = ~self.occupied & self.geo.full_mask
+        return (free & -free).bit_length() - 1 if free else None
+
+    def score_around(self, cell):
+        """Player 1 sum minus player 2 sum over the neighbours of cell."""
+        return self.around[cell]
+
+    def legal_moves(self):
+        """(cell, num) for every placement open to the side to move."""
+        cells = self.empty_cells()
+        return [(cell, num) for num in self.numbers(self.to_move) for cell in cells]
+
+    def hole_sums(self, hole=None):
+        """{player: sum of that player's numbers around hole}; by default the
+        hole is the last empty circle of a finished game."""
+        if hole is None:
+            hole = self.first_empty()
+        return {p: sum(self.values[p][i] for i in self.geo.neighbours[hole]) for p in (1, 2)}
+
+    def winner(self):
+        """Winner of a finished game: the lower sum around the black hole
+        wins, and player 2 takes ties."""
+        sums = self.hole_sums()
+        return 1 if sums[1] < sums[2] else 2
+
+    def evaluate(self):
+        # the lowest empty circle stands in for the black hole until the end
+        hole = self.first_empty()
+        return 0 if hole is None else self.score_around(hole)
+
+    def expected_score(self):
+        """Mean score_around over the empty circles: every one is equally
+        likely to end up the black hole. Exact once the game is over, and
+        unchanged by the mirror image or by swapping interchangeable circles."""
+        return self.hole_total / self.empty_count
+
+
+class TranspositionTable:
+    """Search results by State.key within a fixed memory budget.
+
+    Each slot holds (key, depth, bound, value, best move, generation). A slot
+    is overwritten by the same position, by anything once its entry is from
+    an earlier search, or by an entry searched at least as deep; otherwise
+    the deeper current entry is kept."""
+
+    # rough size of one filled slot: the tuple, its key int, the move tuple
+    # and the list pointer
+    ENTRY_BYTES = 200
+
+    def __init__(self, megabytes=32):
+        self.megabytes = megabytes
+        self.size = max(1, int(megabytes * 2**20) // self.ENTRY_BYTES)
+        self.clear()
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.used = 0
+        self.generation = 0
+        self.probes = self.hits = self.cutoffs = self.stores = self.replaced = 0
+
+    def new_search(self):
+        # entries from earlier moves stay usable but may now be replaced
+        self.generation += 1
+
+    def probe(self, key):
+        """(depth, bound, value, move) stored for key, or None."""
+        self.probes += 1
+        slot = self.slots[key % self.size]
+        if slot is not None and slot[0] == key:
+            self.hits += 1
+            return slot[1:5]
+        return None
+
+    def store(self, key, depth, bound, value, move):
+        i = key % self.size
+        old = self.slots[i]
+        if old is None:
+            self.used += 1
+        elif old[0] != key:
+            if old[5] == self.generation and old[1] > depth:
+                return
+            self.replaced += 1
+        self.slots[i] = (key, depth, bound, value, move, self.generation)
+        self.stores += 1
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def report(self):
+        return (f"TT {self.megabytes} MB: {self.hit_rate():.1%} hits of {self.probes} probes, "
+                f"{self.cutoffs} cutoffs, {self.used}/{self.size} slots, {self.replaced} replaced")
+
+
+def minimax(state, depth, alpha, beta, tt=None, tb=None):
+    if depth == 0 or state.is_over():
+        return state.evaluate()
+    if tb is not None and state.empty_count == tb.empties:
+        hit = tb.probe(state)
+        if hit is not None:
+            return hit[0]
+    player = state.to_move
+    tt_move = None
+    if tt is not None:
+        entry = tt.probe(state.key)
+        if entry is not None:
+            stored_depth, bound, value, tt_move = entry
+            if stored_depth >= depth:
+                if bound == EXACT:
+                    tt.cutoffs += 1
+                    return value
+                if bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    tt.cutoffs += 1
+                    return value
+            if tt_move is not None:
+                cell, num = tt_move
+                if state.occupied >> cell & 1 or not state.available[player] >> num & 1:
+                    tt_move = None  # hash collision
+    window = (alpha, beta)
+    maximizing = player == 2
+    best_val = -math.inf if maximizing else math.inf
+    best = None
+    if tt_move is not None:
+        # the stored best move goes first; it often settles the node alone
+        cell, num = tt_move
+        state.place(cell, num)
+        best_val = minimax(state, depth - 1, alpha, beta, tt, tb)
+        state.unplace(cell)
+        best = tt_move
+        if maximizing:
+            alpha = max(alpha, best_val)
+        else:
+            beta = min(beta, best_val)
+    if alpha < beta:
+        empties = state.empty_cells()
+        for num in state.numbers(player):
+            for cell in empties:
+                if (cell, num) == tt_move:
+                    continue
+                state.place(cell, num)
+                val = minimax(state, depth - 1, alpha, beta, tt, tb)
+                state.unplace(cell)
+                if maximizing:
+                    if val > best_val:
+                        best_val, best = val, (cell, num)
+                    alpha = max(alpha, val)
+                else:
+                    if val < best_val:
+                        best_val, best = val, (cell, num)
+                    beta = min(beta, val)
+                if beta <= alpha:
+                    break
+            # a cutoff ends the whole node: searching the remaining numbers
+            # with a closed window only returns values that are not valid
+            # bounds, and those must not reach the table
+            if beta <= alpha:
+                break
+    if tt is not None:
+        if best_val <= window[0]:
+            bound = UPPER
+        elif best_val >= window[1]:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(state.key, depth, bound, best_val, best)
+    return best_val
+
+
+def minimax_search(state, depth, tt=None, exact_empties=0, tb=None):
+    """search() on top of minimax, every root move with a full window; the
+    reference for node counts."""
+    if tb is not None and state.empty_count == tb.empties:
+        hit = tb.probe(state)
+        if hit is not None:
+            return hit
+    if state.empty_count <= exact_empties:
+        depth = state.empty_count - 1
+    if tt is not None:
+        tt.new_search()
+    sign = 1 if state.to_move == 2 else -1  # player 1 minimises
+    best_score = -math.inf
+    best = None
+    empties = state.empty_cells()
+    for num in state.numbers(state.to_move):
+        for cell in empties:
+            state.place(cell, num)
+            score = sign * minimax(state, depth - 1, -math.inf, math.inf, tt, tb)
+            state.unplace(cell)
+            if score > best_score:
+                best_score = score
+                best = (cell, num)
+    return sign * best_score, best
+
+
+class SearchStopped(Exception):
+    """Raised inside Negamax once its stop flag is set. The state searched
+    is left part way through the search."""
+
+
+# interior nodes between polls of Negamax.stop
+STOP_POLL = 64
+
+
+class Negamax:
+    """Alpha-beta in negamax form: values are from the view of the side to
+    move (player 1 sum - player 2 sum when player 2 moves, the negation
+    when player 1 does), and a cutoff ends the node.
+
+    Each node searches one flat move list: the transposition table move,
+    then the ply's two killer moves (the last ones to cause a cutoff at
+    this depth of the game), then the rest by history score (depth^2 added
+    per cutoff). Empty circles that are interchangeable for the rest of
+    the game get searched once:
+    - in a symmetric position, a circle and its mirror image;
+    - twins, meaning two circles with equal neighbour sums and the same
+      empty neighbours apart from each other.
+
+    Depth-limited leaves use State.expected_score, which both merges
+    preserve, so the merged moves are exact duplicates at any depth. One
+    ply above the leaves the numbers merge too: a leaf's score is linear in
+    the number placed, so only the smallest one in hand is scored.
+
+    `leaves` counts leaf evaluations (including tablebase hits) and
+    `cutoffs` beta cutoffs, over every search run on the instance; nodes
+    are counted by the State.
+
+    stop is anything with an is_set() method, such as an Event. It is
+    polled every STOP_POLL interior nodes, and SearchStopped is raised
+    once it is set."""
+
+    def __init__(self, tt=None, tb=None, exact_empties=0, stop=None):
+        self.tt = tt
+        self.tb = tb
+        self.exact_empties = exact_empties
+        self.stop = stop
+        self.polls = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        # sized for the largest pyramid, so one instance searches any size
+        self.killers = [[None, None] for _ in range(MAX_CELLS + 1)]  # by empty_count
+        self.history = [0] * (3 * MAX_CELLS * _STRIDE)
+
+    def cells(self, state):
+        """Empty circles to place on, one per interchangeable group, ascending."""
+        geo = state.geo
+        free = ~state.occupied & geo.full_mask
+        mirror = geo.mirror
+        masks = geo.neighbour_masks
+        symmetric = state.key == state.mirror_key
+        around_sum = state.around
+        seen = set()
+        cells = []
+        for cell in state.empty_cells():
+            if symmetric and mirror[cell] < cell:
+                continue
+            total = around_sum[cell]
+            around = masks[cell] & free
+            # a twin apart from this circle has the same empty neighbours; a
+            # twin next to it has them once each adds the other circle itself
+            apart = (0, total, around)
+            beside = (1, total, around | 1 << cell)
+            if apart in seen or beside in seen:
+                continue
+            seen.add(apart)
+            seen.add(beside)
+            cells.append(cell)
+        return cells
+
+    def moves(self, state, tt_move=None):
+        """Flat (cell, num) list in search order; equal scores keep the
+        serial (number, circle) order."""
+        player = state.to_move
+        cells = self.cells(state)
+        moves = [(cell, num) for num in state.numbers(player) for cell in cells]
+        history = self.history
+        base = player * MAX_CELLS
+        killers = self.killers[state.empty_count]
+        first = {tt_move: 2 ** 62, killers[0]: 2 ** 61, killers[1]: 2 ** 60}
+        first.pop(None, None)
+        moves.sort(key=lambda m: first.get(m, 0) + history[(base + m[0]) * _STRIDE + m[1]], reverse=True)
+        return moves
+
+    def value(self, state, depth, alpha, beta):
+        sign = 1 if state.to_move == 2 else -1
+        if state.is_over():
+            self.leaves += 1
+            return sign * state.score_around(state.first_empty())
+        if depth == 0:
+            self.leaves += 1
+            return sign * state.expected_score()
+        tb = self.tb
+        if tb is not None and state.empty_count == tb.empties:
+            hit = tb.probe(state)
+            if hit is not None:
+                self.leaves += 1
+                return sign * hit[0]
+        if depth == 1:
+            return self.horizon(state, sign, beta)
+        if self.stop is not None:
+            self.polls -= 1
+            if self.polls <= 0:
+                self.polls = STOP_POLL
+                if self.stop.is_set():
+                    raise SearchStopped
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            entry = tt.probe(state.key)
+            if entry is not None:
+                stored_depth, bound, stored, tt_move = entry
+                if stored_depth >= depth:
+                    if bound == EXACT:
+                        tt.cutoffs += 1
+                        return stored
+                    if bound == LOWER:
+                        alpha = max(alpha, stored)
+                    else:
+                        beta = min(beta, stored)
+                    if alpha >= beta:
+                        tt.cutoffs += 1
+                        return stored
+        alpha0 = alpha
+        best_val = -math.inf
+        best = None
+        for move in self.moves(state, tt_move):
+            cell = move[0]
+            state.place(cell, move[1])
+            val = -self.value(state, depth - 1, -beta, -alpha)
+            state.unplace(cell)
+            if val > best_val:
+                best_val, best = val, move
+                if val > alpha:
+                    alpha = val
+                    if alpha >= beta:
+                        self.cutoff(state, move, depth)
+                        break
+        if tt is not None:
+            if best_val <= alpha0:
+                bound = UPPER
+            elif best_val >= beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            tt.store(state.key, depth, bound, best_val, best)
+        return best_val
+
+    def horizon(self, state, sign, beta):
+        # every child is a leaf: num on cell scores
+        #   (sign * (hole_total - around[cell]) - num * k) / (empties left)
+        # with k the cell's empty neighbours, so the smallest number is best
+        free = ~state.occupied & state.geo.full_mask
+        masks = state.geo.neighbour_masks
+        hand = state.available[state.to_move]
+        num = (hand & -hand).bit_length() - 1
+        total = sign * state.hole_total
+        around = state.around
+        left = state.empty_count - 1
+        best_val = -math.inf
+        scored = 0
+        for cell in self.cells(state):
+            scored += 1
+            val = (total - sign * around[cell] - num * bin(masks[cell] & free).count("1")) / left
+            if val > best_val:
+                best_val = val
+                if val >= beta:
+                    self.cutoffs += 1
+                    break
+        state.nodes += scored
+        self.leaves += scored
+        return best_val
+
+    def cutoff(self, state, move, depth):
+        self.cutoffs += 1
+        killers = self.killers[state.empty_count]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[(state.to_move * MAX_CELLS + move[0]) * _STRIDE + move[1]] += depth * depth
+
+    def search(self, state, depth):
+        """(score, (cell, num)) as search() returns. Each root move is searched
+        with a window opening just below the best score so far, so moves tying
+        it keep exact scores and ties go to the serial (number, circle) order."""
+        tb = self.tb
+        if tb is not None and state.empty_count == tb.empties:
+            hit = tb.probe(state)
+            if hit is not None:
+                return hit
+        if state.empty_count <= self.exact_empties:
+            depth = state.empty_count - 1
+        tt = self.tt
+        tt_move = None
+        if tt is not None:
+            tt.new_search()
+            entry = tt.probe(state.key)
+            if entry is not None:
+                tt_move = entry[3]
+        best_val = -math.inf
+        best_key = None
+        for cell, num in self.moves(state, tt_move):
+            state.place(cell, num)
+            val = -self.value(state, depth - 1, -math.inf, 1 - best_val)
+            state.unplace(cell)
+            if best_key is None or (val, -num, -cell) > best_key:
+                best_key = (val, -num, -cell)
+                best_val = max(best_val, val)
+        score, num, cell = best_key
+        if tt is not None:
+            tt.store(state.key, depth, EXACT, score, (-cell, -num))
+        sign = 1 if state.to_move == 2 else -1
+        return sign * score, (-cell, -num)
+
+
+def search(state, depth, tt=None, exact_empties=0, tb=None):
+    """(score, (cell, num)) of the best move for the side to move, searching
+    depth plies (to the end of the game once at most exact_empties circles
+    are empty). score is player 1 sum - player 2 sum, as in minimax."""
+    return Negamax(tt, tb, exact_empties).search(state, depth)
+
+
+def best_move(state, depth, tt=None, exact_empties=0, tb=None):
+    """Best (cell, num) for the side to move in state; see search()."""
+    return search(state, depth, tt, exact_empties, tb)[1]
+
+
+def deepening_depths(state, max_depth, exact_empties=0, tb=None):
+    """Depths iterative deepening searches state at: 1..max_depth, or just
+    the rest of the game when the exact search or a tablebase hit settles
+    it. The tablebase only holds sampled positions, so a miss deepens as
+    usual."""
+    remaining = state.empty_count - 1
+    if state.empty_count <= exact_empties:
+        return [remaining]
+    if tb is not None and state.empty_count == tb.empties and tb.probe(state) is not None:
+        return [remaining]
+    return list(range(1, min(max_depth, remaining) + 1))
+
+
+def iterative_deepening(state, max_depth, tt=None, exact_empties=0, tb=None):
+    """Yield (depth, score, move) after each completed depth; each depth
+    reuses the table entries, killers and history of the last one."""
+    negamax = Negamax(tt, tb, exact_empties)
+    for depth in deepening_depths(state, max_depth, exact_empties, tb):
+        yield (depth,) + negamax.search(state, depth)
+
+
+def branching_factor(nodes, depth):
+    """Effective branching factor: the b with b ** depth = nodes."""
+    return nodes ** (1 / depth) if nodes > 0 and depth > 0 else 0.0
+
+
+def move_stats(nodes, leaves, cutoffs, seconds, depth, depth_nodes):
+    """Counters of one AI move so far as a dict: nodes, leaf evaluations,
+    beta cutoffs, seconds and nodes per second since the move started, and
+    the effective branching factor of the last depth (depth_nodes nodes)."""
+    return {
+        "depth": depth,
+        "nodes": nodes,
+        "leaves": leaves,
+        "cutoffs": cutoffs,
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds if seconds > 0 else 0.0,
+        "ebf": branching_factor(depth_nodes, depth),
+    }
+
+
+def think_worker(board, available_numbers, max_depth, exact_empties, tb_path, out,
+                 tt_megabytes=32, workers=1, stop=None):
+    """Process entry point for background AI moves. Puts ("depth", depth,
+    score, move, tt hits, tt probes, move_stats dict) on the queue out as
+    each depth completes, then ("done",).
+
+    With one worker the caller may terminate the process at any time. With
+    more, each depth is a parallel root search on a pool of its own (tt
+    counts are then 0); set the event stop instead so the pool is shut down
+    with the process. A tablebase hit at the root is sent as the only
+    depth, without searching."""
+    state = State.from_board(board, available_numbers, 2)
+    tb = None
+    if tb_path:
+        from Black_hole_tablebase import Tablebase  # it imports this module
+        try:
+            tb = Tablebase(tb_path)
+        except (OSError, ValueError):
+            # missing, or left half written by an interrupted generator run
+            tb_path = None
+        else:
+            if tb.rows != state.geo.rows:
+                # solved for another board size
+                tb.close()
+                tb = tb_path = None
+    start = perf_counter()
+    hit = tb.probe(state) if tb is not None and state.empty_count == tb.empties else None
+    if hit is not None:
+        # the tablebase settles the game; no search, parallel or not
+        depth = state.empty_count - 1
+        stats = move_stats(0, 0, 0, perf_counter() - start, depth, 0)
+        out.put(("depth", depth) + hit + (0, 0, stats))
+        out.put(("done",))
+        return
+    if workers > 1:
+        from Black_hole_parallel import ParallelRootSearch
+        parallel = ParallelRootSearch(workers, tt_megabytes, tb_path, exact_empties)
+        nodes = leaves = cutoffs = 0
+        try:
+            for depth in deepening_depths(state, max_depth, exact_empties, tb):
+                result = parallel.search(state, depth, stop)
+                if result is None:
+                    return
+                nodes += parallel.nodes
+                leaves += parallel.leaves
+                cutoffs += parallel.cutoffs
+                stats = move_stats(nodes, leaves, cutoffs, perf_counter() - start, depth, parallel.nodes)
+                out.put(("depth", depth) + result + (0, 0, stats))
+        finally:
+            parallel.close()
+    else:
+        tt = TranspositionTable(tt_megabytes)
+        negamax = Negamax(tt, tb, exact_empties)
+        for depth in deepening_depths(state, max_depth, exact_empties, tb):
+            before = state.nodes
+            score, move = negamax.search(state, depth)
+            stats = move_stats(state.nodes, negamax.leaves, negamax.cutoffs, perf_counter() - start,
+                               depth, state.nodes - before)
+            out.put(("depth", depth, score, move, tt.hits, tt.probes, stats))
+    out.put(("done",))
+
+
+def random_state(rng, placed, rows=6):
+    """State after `placed` random placements, player 1 first; for benchmarks."""
+    state = State(rows)
+    cells = list(range(state.geo.cells))
+    rng.shuffle(cells)
+    for cell in cells[:placed]:
+        state.place(cell, rng.choice(state.numbers(state.to_move)))
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Black Hole search: minimax vs negamax node counts.")
+    parser.add_argument("--depth", type=int, default=3, help="search depth in plies")
+    parser.add_argument("--positions", type=int, default=5, help="random positions to search")
+    parser.add_argument("--placed", type=int, default=7,
+                        help="pieces already on the board (odd, so player 2 is to move)")
+    parser.add_argument("--rows", type=int, default=6, help=f"pyramid rows (2-{MAX_ROWS})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tt-mb", type=float, default=32,
+                        help="transposition table budget in MB per search (0 = none)")
+    args = parser.parse_args(argv)
+    if not 2 <= args.rows <= MAX_ROWS:
+        parser.error(f"--rows must be between 2 and {MAX_ROWS}")
+    if args.placed % 2 == 0:
+        parser.error("--placed must be odd so the AI (player 2) is to move")
+    rng = random.Random(args.seed)
+    totals = [0, 0.0, 0, 0.0]
+    print(f"{'pos':>3} {'minimax nodes':>14} {'secs':>7} {'negamax nodes':>14} {'secs':>7} {'ratio':>6}  moves")
+    for i in range(args.positions):
+        state = random_state(rng, args.placed, args.rows)
+        row = []
+        for searcher in (minimax_search, search):
+            tt = TranspositionTable(args.tt_mb) if args.tt_mb else None
+            state.nodes = 0
+            start = perf_counter()
+            _, move = searcher(state, args.depth, tt)
+            row += [state.nodes, perf_counter() - start, move]
+        old_nodes, old_secs, old_move, new_nodes, new_secs, new_move = row
+        totals = [totals[0] + old_nodes, totals[1] + old_secs, totals[2] + new_nodes, totals[3] + new_secs]
+        print(f"{i:>3} {old_nodes:>14,} {old_secs:>7.2f} {new_nodes:>14,} {new_secs:>7.2f} "
+              f"{old_nodes / new_nodes:>5.1f}x  {old_move} {new_move}")
+    print(f"all {totals[0]:>14,} {totals[1]:>7.2f} {totals[2]:>14,} {totals[3]:>7.2f} "
+          f"{totals[0] / totals[2]:>5.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Monte Carlo Tree Search for Black Hole
+--------------------------------------
+UCT over the same move list Negamax searches (interchangeable circles
+merged), scored by random playouts to the real end of the game: the win
+or loss of the side that moved into a node, plus the final (player 1 sum
+- player 2 sum) for reporting.
+
+A playout does not place pieces one by one. Under uniformly random
+play, every empty circle is equally likely to be the black hole. The
+circles fill in a uniformly random order. Each player's numbers go down
+as a uniformly random draw from their hand. So a playout picks the hole,
+picks random fill positions for the hole's empty neighbours only (the
+parity of a position says who fills it), and draws those players'
+numbers. That is a handful of array lookups per playout, with the same
+distribution of results as playing the game out.
+
+The tree is kept between moves. search() first walks the old root down
+through the placements made since (its own move and the reply), and
+keeps that subtree. Each search stops at a strict time or playout
+budget.
+
+    python Black_hole_mcts.py --seconds 1 --positions 5
+"""
+
+import argparse
+import math
+import queue
+import random
+import sys
+from time import perf_counter
+
+import Black_hole_engine as engine
+
+# UCT exploration constant for win rates in 0..1
+EXPLORATION = 1.0
+
+# iterations between clock checks; a few hundred microseconds of search
+CHECK_EVERY = 32
+
+
+class Node:
+    __slots__ = ("move", "parent", "mover", "children", "untried", "visits", "wins", "score")
+
+    def __init__(self, move, parent, mover):
+        self.move = move
+        self.parent = parent
+        self.mover = mover  # player who made move; wins count for them
+        self.children = []
+        self.untried = None  # moves not expanded yet, listed on the first visit
+        self.visits = 0
+        self.wins = 0
+        self.score = 0  # sum of final (player 1 - player 2) scores
+
+
+def playout(state, rng):
+    """Final (player 1 sum - player 2 sum) of one uniformly random playout
+    from state; state is left unchanged."""
+    free = state.empty_cells()
+    hole = free[int(rng.random() * len(free))]
+    score = state.around[hole]
+    around = state.geo.neighbour_masks[hole] & ~state.occupied
+    if not around:
+        return score
+    neighbours = []
+    while around:
+        low = around & -around
+        neighbours.append(low.bit_length() - 1)
+        around ^= low
+    # fill positions among the other len(free) - 1 circles; even ones go to the side to move
+    slots = rng.sample(range(len(free) - 1), len(neighbours))
+    counts = [0, 0]
+    for slot in slots:
+        counts[slot & 1] += 1
+    p = state.to_move
+    drawn = (rng.sample(state.numbers(p), counts[0]), rng.sample(state.numbers(3 - p), counts[1]))
+    sign = (1, -1) if p == 1 else (-1, 1)
+    for slot in slots:
+        side = slot & 1
+        counts[side] -= 1
+        score += sign[side] * drawn[side][counts[side]]
+    return score
+
+
+def _copy(state):
+    board = [None] * state.geo.cells
+    for player in (1, 2):
+        for cell, num in enumerate(state.values[player]):
+            if num:
+                board[cell] = (player, num)
+    hands = {p: set(state.numbers(p)) for p in (1, 2)}
+    return engine.State.from_board(board, hands, state.to_move)
+
+
+class MCTS:
+    """A search tree that survives between moves; search() each turn."""
+
+    def __init__(self, seed=None, exploration=EXPLORATION):
+        self.rng = random.Random(seed)
+        self.exploration = exploration
+        self.root = None
+        self.root_state = None
+        self.negamax = engine.Negamax()  # for its merged move lists
+
+    def moves(self, state):
+        cells = self.negamax.cells(state)
+        moves = [(cell, num) for num in state.numbers(state.to_move) for cell in cells]
+        self.rng.shuffle(moves)
+        return moves
+
+    def advance(self, state):
+        """Make state the root, keeping the subtree under it if state follows
+        from the old root by placements the tree holds. Returns the playouts
+        kept."""
+        node, old = self.root, self.root_state
+        if node is not None and old.geo is state.geo and old.occupied & ~state.occupied == 0:
+            # placements since the old root, in turn order (the old root's side first)
+            new = state.occupied & ~old.occupied
+            placed = {1: [], 2: []}
+            while new:
+                low = new & -new
+                cell = low.bit_length() - 1
+                new ^= low
+                for player in (1, 2):
+                    if state.values[player][cell]:
+                        placed[player].append((cell, state.values[player][cell]))
+            turn = old.to_move
+            order = []
+            while placed[turn]:
+                order.append(placed[turn].pop())
+                turn = 3 - turn
+            if placed[1] or placed[2] or len(order) != old.empty_count - state.empty_count:
+                node = None
+            for move in order:
+                if node is None:
+                    break
+                node = next((child for child in node.children if child.move == move), None)
+            if node is not None and state.key == self._key_after(old, order):
+                node.parent = None
+                self.root, self.root_state = node, state
+                return node.visits
+        self.root = Node(None, None, 3 - state.to_move)
+        self.root_state = state
+        return 0
+
+    @staticmethod
+    def _key_after(state, moves):
+        # Zobrist key of state after moves, without changing state
+        for cell, num in moves:
+            state.place(cell, num)
+        key = state.key
+        for cell, _ in reversed(moves):
+            state.unplace(cell)
+        return key
+
+    def search(self, state, seconds=None, playouts=None):
+        """(score, (cell, num), stats) for the side to move in state after
+        `seconds` of search or `playouts` new playouts, whichever ends
+        first. score is the chosen move's mean final (player 1 - player 2)
+        score; stats holds playouts, playouts_per_sec, nodes, reused and
+        seconds."""
+        state = _copy(state)  # the tree keeps it as its root; the caller's may move on
+        reused = self.advance(state)
+        root = self.root
+        start = perf_counter()
+        deadline = None if seconds is None else start + seconds
+        rng = self.rng
+        c = self.exploration
+        done = 0
+        nodes = 0
+        while True:
+            for _ in range(CHECK_EVERY):
+                node = root
+                placed = []
+                # selection: down through fully expanded nodes by UCT
+                while True:
+                    if node.untried is None:
+                        node.untried = [] if state.is_over() else self.moves(state)
+                    if node.untried or not node.children:
+                        break
+                    log_n = math.log(node.visits)
+                    best, best_val = None, -1.0
+                    for child in node.children:
+                        val = child.wins / child.visits + c * math.sqrt(log_n / child.visits)
+                        if val > best_val:
+                            best, best_val = child, val
+                    node = best
+                    state.place(*node.move)
+                    placed.append(node.move[0])
+                # expansion: one new child
+                if node.untried:
+                    move = node.untried.pop()
+                    child = Node(move, node, state.to_move)
+                    node.children.append(child)
+                    node = child
+                    state.place(*move)
+                    placed.append(move[0])
+                    nodes += 1
+                # simulation
+                if state.is_over():
+                    score = state.around[state.first_empty()]
+                else:
+                    score = playout(state, rng)
+                # backpropagation: player 1 wins with the lower sum, player 2 takes ties
+                winner = 1 if score < 0 else 2
+                while node is not None:
+                    node.visits += 1
+                    node.score += score
+                    if node.mover == winner:
+                        node.wins += 1
+                    node = node.parent
+                for cell in reversed(placed):
+                    state.unplace(cell)
+                done += 1
+                if playouts is not None and done >= playouts:
+                    break
+            if playouts is not None and done >= playouts:
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                break
+        elapsed = perf_counter() - start
+        best = max(root.children, key=lambda child: child.visits)
+        stats = {
+            "playouts": done,
+            "playouts_per_sec": done / elapsed if elapsed > 0 else 0.0,
+            "nodes": nodes,
+            "reused": reused,
+            "seconds": elapsed,
+        }
+        return best.score / best.visits, best.move, stats
+
+
+def best_move(state, seconds=None, playouts=None, seed=None):
+    """Best (cell, num) by a fresh MCTS; see MCTS.search."""
+    return MCTS(seed).search(state, seconds, playouts)[1]
+
+
+def mcts_worker(requests, out):
+    """Process entry point keeping one tree across the game's AI moves.
+    Takes (request id, board, available_numbers, seconds) from requests,
+    puts ("mcts", request id, score, move, stats) about every quarter
+    second while searching and then ("done", request id); None ends it."""
+    mcts = MCTS()
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        request_id, board, available_numbers, seconds = request
+        state = engine.State.from_board(board, available_numbers, 2)
+        start = perf_counter()
+        total = None
+        while True:
+            left = seconds - (perf_counter() - start)
+            score, move, stats = mcts.search(state, min(0.25, max(0.0, left)))
+            if total is None:
+                total = stats
+            else:
+                total = dict(stats, reused=total["reused"], playouts=total["playouts"] + stats["playouts"],
+                             nodes=total["nodes"] + stats["nodes"])
+            total["seconds"] = perf_counter() - start
+            total["playouts_per_sec"] = total["playouts"] / total["seconds"]
+            out.put(("mcts", request_id, score, move, total))
+            if left <= 0.25:
+                break
+            try:
+                # a newer request supersedes this one
+                pending = requests.get_nowait()
+            except queue.Empty:
+                continue
+            requests.put(pending)
+            break
+        out.put(("done", request_id))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Black Hole MCTS: playouts per second and moves.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="search time per position")
+    parser.add_argument("--positions", type=int, default=5, help="random positions to search")
+    parser.add_argument("--placed", type=int, default=5,
+                        help="pieces already on the board (odd, so player 2 is to move)")
+    parser.add_argument("--rows", type=int, default=6, help=f"pyramid rows (2-{engine.MAX_ROWS})")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+    print(f"{'pos':>3} {'playouts':>10} {'per sec':>10} {'nodes':>8} {'score':>7}  move")
+    total = elapsed = 0
+    for i in range(args.positions):
+        state = engine.random_state(rng, args.placed, args.rows)
+        score, move, stats = MCTS(args.seed).search(state, args.seconds)
+        total += stats["playouts"]
+        elapsed += stats["seconds"]
+        print(f"{i:>3} {stats['playouts']:>10,} {stats['playouts_per_sec']:>10,.0f} "
+              f"{stats['nodes']:>8,} {score:>7.2f}  {move}")
+    print(f"all {total:>10,} {total / elapsed:>10,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
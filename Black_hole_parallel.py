@@ -0,0 +1,197 @@
+"""
+Parallel root search for Black Hole
+-----------------------------------
+Every root move (number, circle) is searched as its own task on a process
+pool. The root moves are submitted best-first by a one-ply static score.
+Tasks share the best score found so far through a shared array. Each task
+reads it when it starts and searches with a window that opens one point
+below it, so a child that cannot tie the best fails low quickly, while
+every move that ties the best still gets an exact score.
+
+A stopped search marks its id in the shared array too. Every task of it
+polls that from inside Negamax, so running tasks end within a few
+milliseconds rather than finishing their subtree.
+
+The merge takes the highest score, breaking ties by the order the serial
+search (engine.search) tries moves. So the parallel search picks the same
+move as the serial one however the tasks happen to finish.
+
+    python Black_hole_parallel.py --depths 2 3 4 --workers 4
+"""
+
+import argparse
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from time import perf_counter
+
+import Black_hole_engine as engine
+
+# per worker process: shared [search id, best score, stopped search id],
+# transposition table, tablebase and the Negamax of the current search
+_shared = None
+_tt = None
+_tb = None
+_search_id = None
+_negamax = None
+
+
+def _init_worker(shared, tt_megabytes, tb_path):
+    global _shared, _tt, _tb
+    _shared = shared
+    _tt = engine.TranspositionTable(tt_megabytes)
+    if tb_path:
+        from Black_hole_tablebase import Tablebase
+        try:
+            _tb = Tablebase(tb_path)
+        except (OSError, ValueError):
+            _tb = None
+
+
+class _StopFlag:
+    # set once the search with this id is stopped; read by Negamax
+    def __init__(self, search_id):
+        self.search_id = search_id
+
+    def is_set(self):
+        return _shared[2] == self.search_id
+
+
+def _search_move(args):
+    # one root move; scores are from the root mover's side (higher is better);
+    # None if the search was stopped
+    global _search_id, _negamax
+    state, depth, search_id, index, cell, num = args
+    if search_id != _search_id:
+        _tt.clear()  # a new root position
+        _negamax = engine.Negamax(_tt, _tb, stop=_StopFlag(search_id))
+        _search_id = search_id
+    with _shared.get_lock():
+        best = _shared[1] if _shared[0] == search_id else -math.inf
+    leaves, cutoffs = _negamax.leaves, _negamax.cutoffs
+    state.nodes = 0
+    state.place(cell, num)
+    try:
+        score = -_negamax.value(state, depth - 1, -math.inf, 1 - best)
+    except engine.SearchStopped:
+        return None
+    with _shared.get_lock():
+        if _shared[0] == search_id and score > _shared[1]:
+            _shared[1] = score
+    return index, score, cell, num, (state.nodes, _negamax.leaves - leaves, _negamax.cutoffs - cutoffs)
+
+
+def static_order(state):
+    """Root moves as (serial index, cell, num), best first by the score one
+    ply ahead; equal scores keep the serial (number, circle) order.
+    Interchangeable circles are merged as in Negamax."""
+    sign = 1 if state.to_move == 2 else -1
+    moves = []
+    cells = engine.Negamax().cells(state)
+    for num in state.numbers(state.to_move):
+        for cell in cells:
+            state.place(cell, num)
+            moves.append((-sign * state.expected_score(), len(moves), cell, num))
+            state.unplace(cell)
+    moves.sort()
+    return [(index, cell, num) for _, index, cell, num in moves]
+
+
+class ParallelRootSearch:
+    """Process pool searching root moves in parallel; close() when done.
+    nodes, leaves and cutoffs add up the counters of the last search over
+    all its tasks."""
+
+    def __init__(self, workers=None, tt_megabytes=32, tb_path=None, exact_empties=0):
+        self.workers = workers or os.cpu_count() or 1
+        self.exact_empties = exact_empties
+        self.shared = mp.Array("d", [0.0, -math.inf, 0.0])
+        self.search_id = 0
+        self.nodes = self.leaves = self.cutoffs = 0
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.shared, tt_megabytes, tb_path))
+
+    def search(self, state, depth, stop=None):
+        """(score, (cell, num)) as engine.search returns for the same depth;
+        None if the event stop is set before the search ends."""
+        if state.empty_count <= self.exact_empties:
+            depth = state.empty_count - 1
+        sign = 1 if state.to_move == 2 else -1
+        self.search_id += 1
+        self.nodes = self.leaves = self.cutoffs = 0
+        with self.shared.get_lock():
+            self.shared[0] = self.search_id
+            self.shared[1] = -math.inf
+        pending = {self.pool.submit(_search_move, (state, depth, self.search_id, index, cell, num))
+                   for index, cell, num in static_order(state)}
+        best = None
+        while pending:
+            done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, score, cell, num, (nodes, leaves, cutoffs) = future.result()
+                self.nodes += nodes
+                self.leaves += leaves
+                self.cutoffs += cutoffs
+                if best is None or (score, -index) > (best[0], -best[1]):
+                    best = (score, index, (cell, num))
+            if stop is not None and stop.is_set():
+                for future in pending:
+                    future.cancel()
+                self.cancel()
+                return None
+        return sign * best[0], best[2]
+
+    def cancel(self):
+        """Stop the tasks of the current search at their next poll."""
+        with self.shared.get_lock():
+            self.shared[2] = self.search_id
+
+    def close(self):
+        self.cancel()
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serial vs parallel Black Hole root search.")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--positions", type=int, default=3, help="random positions per depth")
+    parser.add_argument("--placed", type=int, default=5,
+                        help="pieces already on the board (odd, so player 2 is to move)")
+    parser.add_argument("--rows", type=int, default=6, help=f"pyramid rows (2-{engine.MAX_ROWS})")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tt-mb", type=float, default=32, help="transposition table budget in MB")
+    args = parser.parse_args(argv)
+    if args.placed % 2 == 0:
+        parser.error("--placed must be odd so the AI (player 2) is to move")
+    rng = random.Random(args.seed)
+    states = [engine.random_state(rng, args.placed, args.rows) for _ in range(args.positions)]
+    parallel = ParallelRootSearch(args.workers, args.tt_mb)
+    print(f"{args.positions} positions, {args.placed} placed, {parallel.workers} workers")
+    print(f"{'depth':>5} {'serial s':>9} {'parallel s':>10} {'speedup':>8}  moves")
+    mismatches = 0
+    try:
+        for depth in args.depths:
+            t_serial = t_parallel = 0.0
+            same = 0
+            for state in states:
+                start = perf_counter()
+                serial = engine.search(state, depth, engine.TranspositionTable(args.tt_mb))
+                t_serial += perf_counter() - start
+                start = perf_counter()
+                result = parallel.search(state, depth)
+                t_parallel += perf_counter() - start
+                same += result == serial
+            mismatches += len(states) - same
+            print(f"{depth:>5} {t_serial:>9.2f} {t_parallel:>10.2f} {t_serial / t_parallel:>7.2f}x"
+                  f"  {same}/{len(states)} same")
+    finally:
+        parallel.close()
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Black Hole Pyramid endgame tablebase
+------------------------------------
+Exact results for positions with a fixed number of placements left,
+generated offline and read back through a memory-mapped file.
+
+Only part of a position decides the rest of the game: which circles are
+empty, the numbers still in each hand, and for every empty circle the
+(player 1 - player 2) sum of its filled neighbours. Circles away from every
+empty one never count again. Positions are keyed by a hash of that, taken
+over the pyramid and its mirror image, so boards that differ only in
+settled circles or by reflection share one entry.
+
+The full set of such positions is far too large to enumerate for more
+than a few placements, so the generator fills the table with the positions
+reached in self-play games (random opening, then the AI for both sides)
+and solves each one to the end of the game.
+
+File layout (little-endian):
+
+    header   b"BHTB", version u16, pyramid rows u16, empty circles u16,
+             entries u32
+    entries  key u64, score i16, cell u8, number u8   -- sorted by key
+
+Example:
+    python Black_hole_tablebase.py black_hole_tb.bin --placements 9 --games 200
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Black_hole_engine as engine
+
+MAGIC = b"BHTB"
+VERSION = 2
+HEADER = struct.Struct("<4sHHHI")
+ENTRY = struct.Struct("<QhBB")
+KEY = struct.Struct("<Q")
+
+# neighbour sums lie in -132..132 (at most six neighbours of value 22)
+_SUM_OFFSET = 6 * engine.MAX_NUMBER
+
+_rng = random.Random(0x7AB1E)
+_SUM_KEYS = tuple(tuple(_rng.getrandbits(64) for _ in range(2 * _SUM_OFFSET + 1))
+                  for _ in range(engine.MAX_CELLS))
+_HAND_KEYS = (None,) + tuple(tuple(_rng.getrandbits(64) for _ in range(engine.MAX_NUMBER + 1))
+                             for _ in (1, 2))
+del _rng
+
+
+def endgame_keys(state):
+    """(key, key of the mirror image) of state's endgame signature."""
+    key = mirrored = 0
+    mirror = state.geo.mirror
+    for cell in state.empty_cells():
+        column = state.score_around(cell) + _SUM_OFFSET
+        key ^= _SUM_KEYS[cell][column]
+        mirrored ^= _SUM_KEYS[mirror[cell]][column]
+    for player in (1, 2):
+        for num in state.numbers(player):
+            key ^= _HAND_KEYS[player][num]
+            mirrored ^= _HAND_KEYS[player][num]
+    return key, mirrored
+
+
+def canonical_entry(state, score, move):
+    """(key, score, cell, num) as stored: under the smaller of the two keys,
+    with the move reflected if that key is the mirrored one."""
+    key, mirrored = endgame_keys(state)
+    cell, num = move
+    score = round(score)  # exact scores are whole; the search may hand back floats
+    if mirrored < key:
+        return mirrored, score, state.geo.mirror[cell], num
+    return key, score, cell, num
+
+
+class Tablebase:
+    """Read-only, memory-mapped tablebase; probe() with a State of the
+    pyramid size it was generated for."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                # too short for a header (mmap also refuses empty files)
+                raise ValueError(f"{path} is not a version {VERSION} Black Hole tablebase")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.empties, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} Black Hole tablebase")
+        if len(self.map) != HEADER.size + self.count * ENTRY.size:
+            self.map.close()
+            raise ValueError(f"{path} is truncated")
+        self.probes = 0
+        self.hits = 0
+
+    def _find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(self.map, HEADER.size + mid * ENTRY.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            entry = ENTRY.unpack_from(self.map, HEADER.size + lo * ENTRY.size)
+            if entry[0] == key:
+                return entry
+        return None
+
+    def probe(self, state):
+        """(score, (cell, num)) for state, or None if the table lacks it."""
+        self.probes += 1
+        key, mirrored = endgame_keys(state)
+        entry = self._find(min(key, mirrored))
+        if entry is None:
+            return None
+        self.hits += 1
+        _, score, cell, num = entry
+        if mirrored < key:
+            cell = state.geo.mirror[cell]
+        return score, (cell, num)
+
+    def close(self):
+        self.map.close()
+
+
+def write_tablebase(path, rows, empties, entries):
+    """Write {key: (score, cell, num)} sorted by key."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, empties, len(entries)))
+        for key in sorted(entries):
+            f.write(ENTRY.pack(key, *entries[key]))
+    os.replace(tmp, path)
+
+
+def _solve_game(args):
+    # self-play down to `placements` left, then solve that position exactly
+    seed, placements, depth, random_moves, rows = args
+    rng = random.Random(seed)
+    state = engine.State(rows)
+    tt = engine.TranspositionTable(16)
+    while state.empty_count > placements + 1:
+        if state.geo.cells - state.empty_count < random_moves:
+            move = (rng.choice(state.empty_cells()), rng.choice(state.numbers(state.to_move)))
+        else:
+            move = engine.best_move(state, depth, tt)
+        state.place(*move)
+    score, move = engine.search(state, placements, tt)
+    return canonical_entry(state, score, move)
+
+
+def generate(out_path, placements=9, games=200, workers=None, seed=None, depth=2,
+             random_moves=4, rows=6, log=sys.stderr):
+    """Solve the positions `placements` before the end of `games` self-play
+    games and write them to out_path; returns the number of entries."""
+    rng = random.Random(seed)
+    workers = workers or os.cpu_count() or 1
+    jobs = [(rng.getrandbits(32), placements, depth, random_moves, rows) for _ in range(games)]
+    entries = {}
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, (key, score, cell, num) in enumerate(pool.map(_solve_game, jobs), 1):
+            entries[key] = (score, cell, num)
+            if log is not None and (done % 10 == 0 or done == games):
+                print(f"{done}/{games} games, {len(entries)} positions, "
+                      f"{time.time() - start:.0f}s", file=log)
+    write_tablebase(out_path, rows, placements + 1, entries)
+    return len(entries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a Black Hole endgame tablebase.")
+    parser.add_argument("out", help="tablebase file to write")
+    parser.add_argument("--placements", type=int, default=9,
+                        help="placements left in stored positions (odd: the AI, player 2, to move)")
+    parser.add_argument("--games", type=int, default=200, help="self-play games to sample")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the self-play moves")
+    parser.add_argument("--random-moves", type=int, default=4,
+                        help="random placements opening each game")
+    parser.add_argument("--rows", type=int, default=6,
+                        help=f"pyramid rows (2-{engine.MAX_ROWS}) of the game the table is for")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    if not 2 <= args.rows <= engine.MAX_ROWS:
+        parser.error(f"--rows must be between 2 and {engine.MAX_ROWS}")
+    cells = engine.pyramid(args.rows).cells
+    if not 1 <= args.placements < cells - 1:
+        parser.error(f"--placements must be between 1 and {cells - 2}")
+    count = generate(args.out, args.placements, args.games, args.workers, args.seed,
+                     args.depth, args.random_moves, args.rows)
+    print(f"wrote {count} positions to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
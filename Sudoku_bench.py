@@ -0,0 +1,210 @@
+"""
+Sudoku solver benchmark
+-----------------------
+Runs every solving engine headlessly over the corpora in Sudoku_corpora.txt
+(easy, hard, 17-clue minimum puzzles and known backtracking killers) and
+reports, per engine and corpus: mean and p50/p95/p99 solve time, mean
+search nodes and puzzles per second. Results can be written as JSON and
+compared against a saved baseline; regressions make the exit status 1.
+
+Examples:
+    python Sudoku_bench.py --save baseline.json
+    python Sudoku_bench.py --baseline baseline.json --engines propagation singles
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from time import perf_counter
+
+from Bench_report import fmt, percentile
+from Sudoku_core import (BacktrackSolver, PropagationSolver, board_from_string,
+                         grid_geometry)
+
+CORPORA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sudoku_corpora.txt")
+
+ENGINES = {
+    "propagation": lambda k: PropagationSolver(k),
+    "singles": lambda k: PropagationSolver(k, rules=("naked_single", "hidden_single")),
+    "backtracking": lambda k: BacktrackSolver(k),
+}
+
+
+class _Timeout(Exception):
+    pass
+
+
+def load_corpora(path=CORPORA_PATH):
+    """Return {corpus name: [puzzle string, ...]} in file order."""
+    corpora = {}
+    current = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                current = corpora.setdefault(line[1:-1], [])
+            elif current is None:
+                raise ValueError(f"{path}: puzzle before the first [corpus] header")
+            else:
+                current.append(line.split()[0])
+    return corpora
+
+
+def is_solution(board, puzzle, k):
+    n = k * k
+    cells = [v for row in board for v in row]
+    if any(p and p != v for p, v in zip((v for row in puzzle for v in row), cells)):
+        return False
+    digits = list(range(1, n + 1))
+    return all(sorted(cells[i] for i in unit) == digits for unit in grid_geometry(k)[0])
+
+
+def run_engine(engine, puzzles, time_limit=10.0, repeat=1):
+    """Solve each puzzle with a fresh solver; per puzzle keeps the fastest of
+    repeat runs. A timeout ends the puzzle's repeats: with no run finished it
+    counts as a timeout, otherwise the finished runs are kept and it counts
+    as partial. Returns a summary dict (times in milliseconds)."""
+    times, nodes = [], []
+    timeouts = partial = wrong = 0
+    for text in puzzles:
+        puzzle, k = board_from_string(text)
+        best = None
+        for _ in range(repeat):
+            solver = ENGINES[engine](k)
+            deadline = perf_counter() + time_limit
+
+            def check(_nodes, deadline=deadline):
+                if perf_counter() > deadline:
+                    raise _Timeout
+
+            solver.on_progress = check
+            solver.progress_every = 256
+            board = [row[:] for row in puzzle]
+            start = perf_counter()
+            try:
+                solved = solver.solve(board)
+            except _Timeout:
+                partial += best is not None
+                break
+            elapsed = perf_counter() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, solver.nodes, solved and is_solution(board, puzzle, k))
+        if best is None:
+            timeouts += 1
+            continue
+        times.append(best[0] * 1000)
+        nodes.append(best[1])
+        wrong += not best[2]
+    times.sort()
+    total = sum(times)
+    return {
+        "puzzles": len(puzzles),
+        "solved": len(times) - wrong,
+        "wrong": wrong,
+        "timeouts": timeouts,
+        "partial": partial,
+        "mean_ms": total / len(times) if times else None,
+        "p50_ms": percentile(times, 50),
+        "p95_ms": percentile(times, 95),
+        "p99_ms": percentile(times, 99),
+        "mean_nodes": sum(nodes) / len(nodes) if nodes else None,
+        "puzzles_per_sec": len(times) / (total / 1000) if total else None,
+    }
+
+
+def run(engines, corpora, time_limit=10.0, repeat=1, log=None):
+    results = {}
+    for engine in engines:
+        results[engine] = {}
+        for name, puzzles in corpora.items():
+            summary = run_engine(engine, puzzles, time_limit, repeat)
+            results[engine][name] = summary
+            if log:
+                log(engine, name, summary)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time_limit_s": time_limit,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.10):
+    """List of regression messages: slower mean time or more nodes than the
+    baseline by more than tolerance, more timeouts or partial runs, or wrong
+    answers."""
+    regressions = []
+    for engine, corpora in current["results"].items():
+        for name, now in corpora.items():
+            if now["wrong"]:
+                regressions.append(f"{engine}/{name}: {now['wrong']} wrong solution(s)")
+            before = baseline.get("results", {}).get(engine, {}).get(name)
+            if before is None:
+                continue
+            for key in ("timeouts", "partial"):
+                # baselines from before partial runs were counted lack the key
+                if now[key] > before.get(key, 0):
+                    regressions.append(f"{engine}/{name}: {key} {before.get(key, 0)} -> {now[key]}")
+            for key in ("mean_ms", "mean_nodes"):
+                old, new = before.get(key), now.get(key)
+                if old and new and new > old * (1 + tolerance):
+                    regressions.append(f"{engine}/{name}: {key} {old:.3f} -> {new:.3f} "
+                                       f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_row(engine, name, s):
+    print(f"{engine:<13}{name:<9}{s['solved']:>4}/{s['puzzles']:<4}{s['timeouts']:>4}"
+          f"{s['partial']:>5}{fmt(s['mean_ms'], 9, 2)}{fmt(s['p50_ms'], 9, 2)}"
+          f"{fmt(s['p95_ms'], 9, 2)}{fmt(s['p99_ms'], 9, 2)}{fmt(s['mean_nodes'], 11, 1)}"
+          f"{fmt(s['puzzles_per_sec'], 10, 1)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solving engines.")
+    parser.add_argument("--corpora", default=CORPORA_PATH, help="corpus file")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=list(ENGINES))
+    parser.add_argument("--only", nargs="+", metavar="CORPUS", help="run only these corpora")
+    parser.add_argument("--time-limit", type=float, default=10.0,
+                        help="seconds per run before it counts as a timeout")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per puzzle, fastest kept")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against saved JSON results")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown before flagging a regression (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    corpora = load_corpora(args.corpora)
+    if args.only:
+        missing = set(args.only) - set(corpora)
+        if missing:
+            parser.error(f"unknown corpus: {', '.join(sorted(missing))}")
+        corpora = {name: corpora[name] for name in args.only}
+
+    print(f"{'engine':<13}{'corpus':<9}{'solved':>9}{'t/o':>4}{'part':>5}{'mean ms':>9}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}{'nodes':>11}{'puz/s':>10}")
+    current = run(args.engines, corpora, args.time_limit, args.repeat, log=print_row)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(current, json.load(f), args.tolerance)
+        for msg in regressions:
+            print(f"REGRESSION {msg}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Symmetry-canonical Sudoku solution cache
+----------------------------------------
+Puzzles that differ only by a Sudoku symmetry -- relabelling the digits,
+permuting bands/stacks, permuting rows/columns inside a band/stack, or
+transposing -- share one solution up to that same symmetry. canonical_form
+maps a grid to the lexicographically smallest grid it can be transformed
+into and returns the transform, so equivalent puzzles get the same key.
+
+SolutionCache stores solutions in an SQLite file and evicts the least
+recently used entries beyond max_entries. Every puzzle is stored under its
+exact grid. Canonicalizing costs tens of milliseconds, far more than most
+solves, so only puzzles whose search passes canonical_nodes nodes are also
+stored under their canonical form. A canonical hit is mapped back through
+the inverse transform.
+"""
+
+import itertools
+import sqlite3
+
+from Sudoku_core import DIGITS
+
+# search nodes (about half a millisecond each on 9x9) after which a solve is
+# expected to cost more than canonical_form, so the canonical key is worth it
+CANONICAL_NODES = 50
+
+# prefix of exact-grid keys, keeping them apart from canonical ones
+_EXACT = "="
+
+_SYMBOLS = "." + DIGITS
+
+# beyond this many tied partial transforms the grid is too symmetric or too
+# empty to be worth canonicalizing; it is keyed as is (digits relabelled only)
+MAX_STATES = 50000
+
+_COLUMN_PERMS = {}
+
+
+def _column_perms(k):
+    # every column order that keeps stacks together: stack order x order inside each stack
+    if k not in _COLUMN_PERMS:
+        orders = list(itertools.permutations(range(k)))
+        _COLUMN_PERMS[k] = [
+            tuple(stack * k + inner[p][q] for p, stack in enumerate(stack_order) for q in range(k))
+            for stack_order in orders
+            for inner in itertools.product(orders, repeat=k)
+        ]
+    return _COLUMN_PERMS[k]
+
+
+def _next_rows(rows, k):
+    # a new band may start from any row of an unused band; otherwise stay in the band
+    if len(rows) % k == 0:
+        used = {r // k for r in rows}
+        return [r for r in range(k * k) if r // k not in used]
+    band = rows[-1] // k
+    return [r for r in range(band * k, band * k + k) if r not in rows]
+
+
+def _row_key(row, cols, labels, nxt):
+    # row as canonical labels; unseen digits are numbered in order of appearance
+    key = []
+    new = None
+    for c in cols:
+        v = row[c]
+        if v:
+            lab = labels.get(v) if new is None else new.get(v)
+            if lab is None:
+                if new is None:
+                    new = dict(labels)
+                lab = new[v] = nxt
+                nxt += 1
+            v = lab
+        key.append(v)
+    return tuple(key), (labels if new is None else new), nxt
+
+
+def canonical_form(b, k=3):
+    """Return (key, transform) for board b (list of lists, 0 = empty).
+
+    key is the canonical grid as a string; transform = (transposed, rows,
+    cols, labels) maps b onto it: canonical[i][j] = labels[g[rows[i]][cols[j]]]
+    where g is b or its transpose. Only 9x9 grids are fully canonicalized;
+    larger grids (and degenerate ones, see MAX_STATES) only get their
+    digits relabelled, which is still a valid key, just one fewer
+    equivalent puzzles share."""
+    n = k * k
+    grids = (b, [list(col) for col in zip(*b)])
+    states = None
+    if k == 3:
+        states = [(t, (), cols, {}, 1) for t in (0, 1) for cols in _column_perms(k)]
+        for _ in range(n):
+            best, survivors = None, []
+            for t, rows, cols, labels, nxt in states:
+                g = grids[t]
+                for r in _next_rows(rows, k):
+                    key, new_labels, new_nxt = _row_key(g[r], cols, labels, nxt)
+                    if best is None or key < best:
+                        best, survivors = key, []
+                    if key == best:
+                        survivors.append((t, rows + (r,), cols, new_labels, new_nxt))
+            if len(survivors) > MAX_STATES:
+                states = None
+                break
+            states = survivors
+    if states:
+        t, rows, cols, labels, nxt = states[0]
+    else:
+        t, rows, cols, labels, nxt = 0, tuple(range(n)), tuple(range(n)), {}, 1
+        for row in b:
+            _, labels, nxt = _row_key(row, cols, labels, nxt)
+    # digits missing from the puzzle take the remaining labels in order
+    for d in range(1, n + 1):
+        if d not in labels:
+            labels[d] = nxt
+            nxt += 1
+    transform = (t, rows, cols, labels)
+    return board_key(apply_transform(b, transform)), transform
+
+
+def apply_transform(b, transform):
+    t, rows, cols, labels = transform
+    g = b if not t else [list(col) for col in zip(*b)]
+    return [[labels.get(g[r][c], 0) for c in cols] for r in rows]
+
+
+def invert_transform(b, transform):
+    """Map a grid in canonical coordinates back to the original ones."""
+    t, rows, cols, labels = transform
+    inverse = {lab: d for d, lab in labels.items()}
+    n = len(b)
+    g = [[0] * n for _ in range(n)]
+    for i, r in enumerate(rows):
+        for j, c in enumerate(cols):
+            g[r][c] = inverse.get(b[i][j], 0)
+    return g if not t else [list(col) for col in zip(*g)]
+
+
+def board_key(b):
+    return "".join(_SYMBOLS[v] for row in b for v in row)
+
+
+def _board_from_key(key):
+    n = round(len(key) ** 0.5)
+    values = [_SYMBOLS.index(ch) for ch in key]
+    return [values[r*n:(r+1)*n] for r in range(n)]
+
+
+class SolutionCache:
+    """On-disk map from puzzle to solution with LRU eviction. hits and
+    misses count get() calls."""
+
+    def __init__(self, path, max_entries=100000, canonical_nodes=CANONICAL_NODES):
+        self.path = path
+        self.max_entries = max_entries
+        self.canonical_nodes = canonical_nodes
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS solutions ("
+                        "puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL, used INTEGER NOT NULL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+        self.db.commit()
+        self.size, last = self.db.execute("SELECT COUNT(*), MAX(used) FROM solutions").fetchone()
+        self.clock = last or 0
+
+    def get(self, b, k=3, canonical=False):
+        """Solved copy of board b from the cache, or None. Looks up the exact
+        grid, or with canonical=True any puzzle equivalent to it that was
+        stored with its canonical form."""
+        if canonical:
+            key, transform = canonical_form(b, k)
+        else:
+            key, transform = _EXACT + board_key(b), None
+        row = self.db.execute("SELECT solution FROM solutions WHERE puzzle = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.db.execute("UPDATE solutions SET used = ? WHERE puzzle = ?", (self.clock, key))
+        self.db.commit()
+        solution = _board_from_key(row[0])
+        return solution if transform is None else invert_transform(solution, transform)
+
+    def put(self, b, solution, k=3, canonical=False):
+        """Remember solution for puzzle b under its exact grid and, with
+        canonical=True, its canonical form; evicts least recently used
+        entries."""
+        entries = [(_EXACT + board_key(b), board_key(solution))]
+        if canonical:
+            key, transform = canonical_form(b, k)
+            entries.append((key, board_key(apply_transform(solution, transform))))
+        for key, value in entries:
+            self.clock += 1
+            known = self.db.execute("SELECT 1 FROM solutions WHERE puzzle = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO solutions (puzzle, solution, used) VALUES (?, ?, ?)",
+                            (key, value, self.clock))
+            if known is None:
+                self.size += 1
+        if self.size > self.max_entries:
+            self.db.execute("DELETE FROM solutions WHERE puzzle IN (SELECT puzzle FROM solutions "
+                            "ORDER BY used LIMIT ?)", (self.size - self.max_entries,))
+            self.size = self.max_entries
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
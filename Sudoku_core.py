@@ -0,0 +1,738 @@
+"""
+Sudoku core
+-----------
+Everything needed to represent, check and solve Sudoku grids without a
+display: the compact Grid type, box-size geometry, conflict checks, the
+propagation and backtracking solvers, batch solving and the rule report.
+It imports no GUI toolkit, so worker processes and scripts load it in a
+few milliseconds; Sudoku_solver.py is the tkinter view on top of it.
+
+Headless use:
+    python Sudoku_core.py --batch puzzles.txt
+    python Sudoku_core.py --rule-report puzzles.txt
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+# Supported box sizes: k=3 -> 9x9, k=4 -> 16x16, k=5 -> 25x25
+BOX_SIZES = (3, 4, 5)
+
+# Cell symbols used when a grid is written as a string ('.' = empty)
+DIGITS = "123456789ABCDEFGHIJKLMNOP"
+# str.translate tables between symbols and cell values (as chr(value))
+_PARSE_TABLE = {ord(ch): i + 1 for i, ch in enumerate(DIGITS)}
+_PARSE_TABLE.update({ord("."): 0, ord("0"): 0})
+_FORMAT_TABLE = bytes.maketrans(bytes(range(len(DIGITS) + 1)), ("." + DIGITS).encode("ascii"))
+
+# Deduction rules run before (and after every) search guess, cheapest first
+RULES = ("naked_single", "hidden_single", "locked_candidates",
+         "naked_pair", "hidden_pair", "x_wing")
+
+_GEOMETRY = {}
+_INTERSECTIONS = {}
+
+
+def grid_geometry(k):
+    """Return (units, cell_units, peers) for box size k over flat cell indices r*N+c.
+    Tables are built once per size and shared."""
+    if k in _GEOMETRY:
+        return _GEOMETRY[k]
+    n = k * k
+    rows = [[r*n + c for c in range(n)] for r in range(n)]
+    cols = [[r*n + c for r in range(n)] for c in range(n)]
+    boxes = [[(br*k + r)*n + bc*k + c for r in range(k) for c in range(k)]
+             for br in range(k) for bc in range(k)]
+    units = rows + cols + boxes
+    cell_units = [[] for _ in range(n*n)]
+    for unit in units:
+        for i in unit:
+            cell_units[i].append(unit)
+    peers = [sorted(set(j for u in cell_units[i] for j in u) - {i}) for i in range(n*n)]
+    _GEOMETRY[k] = (units, cell_units, peers)
+    return _GEOMETRY[k]
+
+
+def _intersections(k):
+    # (box & line cells, rest of box, rest of line) for every box/row and box/column pair
+    if k in _INTERSECTIONS:
+        return _INTERSECTIONS[k]
+    n = k * k
+    units = grid_geometry(k)[0]
+    lines, boxes = units[:2*n], units[2*n:]
+    result = []
+    for box in boxes:
+        box_set = set(box)
+        for line in lines:
+            inter = [j for j in line if j in box_set]
+            if inter:
+                result.append((inter, [j for j in box if j not in inter],
+                               [j for j in line if j not in box_set]))
+    _INTERSECTIONS[k] = result
+    return result
+
+
+def board_to_string(b):
+    """Serialize a board (Grid or list of rows) row by row, one symbol per cell."""
+    if isinstance(b, Grid):
+        return b.to_string()
+    return "".join(DIGITS[v - 1] if v else "." for row in b for v in row)
+
+
+def board_from_string(text):
+    """Parse a string written by board_to_string (also accepts '0' for empty).
+    Returns (board, k)."""
+    grid = Grid.from_string(text)
+    return grid.to_rows(), grid.k
+
+
+class Grid:
+    """Compact board: box size k and a flat bytearray of N*N cell values
+    (row-major, 0 = empty). Solvers accept a Grid or a list of rows."""
+
+    __slots__ = ("k", "n", "cells")
+
+    def __init__(self, k=3, cells=None):
+        self.k = k
+        self.n = k * k
+        self.cells = bytearray(self.n * self.n) if cells is None else bytearray(cells)
+        if len(self.cells) != self.n * self.n:
+            raise ValueError(f"a {self.n}x{self.n} grid needs {self.n * self.n} cells")
+
+    @classmethod
+    def from_string(cls, text):
+        text = text.strip()
+        k = round(len(text) ** 0.25)
+        if k * k * k * k != len(text):
+            raise ValueError(f"Grid string has {len(text)} cells, not a square of a square")
+        cells = text.upper().translate(_PARSE_TABLE).encode("latin-1", "replace")
+        if max(cells) > k * k:
+            raise ValueError(f"Grid string has symbols outside '.0{DIGITS[:k*k]}'")
+        return cls(k, cells)
+
+    @classmethod
+    def from_rows(cls, rows):
+        k = round(len(rows) ** 0.5)
+        return cls(k, bytes(v for row in rows for v in row))
+
+    def to_string(self):
+        return self.cells.translate(_FORMAT_TABLE).decode("ascii")
+
+    def to_rows(self):
+        n, cells = self.n, self.cells
+        return [list(cells[r*n:(r+1)*n]) for r in range(n)]
+
+    def copy(self):
+        return Grid(self.k, self.cells)
+
+    def __getitem__(self, rc):
+        r, c = rc
+        return self.cells[r * self.n + c]
+
+    def __setitem__(self, rc, v):
+        r, c = rc
+        self.cells[r * self.n + c] = v
+
+    def __eq__(self, other):
+        return isinstance(other, Grid) and self.k == other.k and self.cells == other.cells
+
+    def __repr__(self):
+        return f"Grid.from_string({self.to_string()!r})"
+
+
+def _flat_values(b):
+    # Grid or list of rows -> flat row-major cell values
+    return b.cells if isinstance(b, Grid) else [v for row in b for v in row]
+
+
+def _store_values(b, values):
+    if isinstance(b, Grid):
+        b.cells[:] = bytes(values)
+    else:
+        n = len(b)
+        for r in range(n):
+            b[r][:] = values[r*n:(r+1)*n]
+
+
+def find_conflicts(b, k=3):
+    """Messages for every repeated digit in a row, column or box of b."""
+    n = k * k
+    values = _flat_values(b)
+    conflicts = []
+    units = grid_geometry(k)[0]
+    for name, group in (("Row", units[:n]), ("Column", units[n:2*n]), ("Box", units[2*n:])):
+        for u, unit in enumerate(group):
+            seen = set()
+            for i in unit:
+                v = values[i]
+                if v == 0:
+                    continue
+                if v in seen:
+                    conflicts.append(f"{name} {u+1} has duplicate {v}")
+                else:
+                    seen.add(v)
+    return conflicts
+
+
+class ConflictTracker:
+    """Board model with per-row/column/box digit counters, updated one cell
+    at a time so conflicts are known without rescanning the grid."""
+
+    def __init__(self, k=3):
+        self.k = k
+        self.n = n = k * k
+        self.grid = Grid(k)
+        # per-unit digit counters, indexed [unit][digit]
+        self.row_counts = [[0] * (n + 1) for _ in range(n)]
+        self.col_counts = [[0] * (n + 1) for _ in range(n)]
+        self.box_counts = [[0] * (n + 1) for _ in range(n)]
+
+    def set(self, r, c, v):
+        """Set cell (r, c) to v (0 = empty). Returns the cells whose conflict
+        state may have changed: this one and peers holding the old or new digit."""
+        n = self.n
+        old = self.grid.cells[r*n + c]
+        if v == old:
+            return []
+        b = r // self.k * self.k + c // self.k
+        if old:
+            self.row_counts[r][old] -= 1
+            self.col_counts[c][old] -= 1
+            self.box_counts[b][old] -= 1
+        self.grid.cells[r*n + c] = v
+        if v:
+            self.row_counts[r][v] += 1
+            self.col_counts[c][v] += 1
+            self.box_counts[b][v] += 1
+        changed = [(r, c)]
+        cells = self.grid.cells
+        for p in grid_geometry(self.k)[2][r*n + c]:
+            if cells[p] and cells[p] in (old, v):
+                changed.append(divmod(p, n))
+        return changed
+
+    def is_conflicting(self, r, c):
+        v = self.grid.cells[r*self.n + c]
+        b = r // self.k * self.k + c // self.k
+        return v != 0 and (self.row_counts[r][v] > 1 or self.col_counts[c][v] > 1
+                           or self.box_counts[b][v] > 1)
+
+    def conflicts(self):
+        """Conflict messages straight from the unit counters."""
+        conflicts = []
+        for name, counts in (("Row", self.row_counts), ("Column", self.col_counts),
+                             ("Box", self.box_counts)):
+            for u, unit in enumerate(counts):
+                for v in range(1, self.n + 1):
+                    for _ in range(unit[v] - 1):
+                        conflicts.append(f"{name} {u+1} has duplicate {v}")
+        return conflicts
+
+
+class _Contradiction(Exception):
+    # raised during propagation when a cell or unit runs out of candidates
+    pass
+
+
+class PropagationSolver:
+    """Bitmask constraint-propagation solver for any box size k (N = k*k).
+
+    Each cell holds a bitmask of candidate digits (bit d-1 for digit d).
+    Placing a digit removes it from the cell's peers; the deduction rules in
+    `rules` (any subset of RULES) then run, cheapest first, until none of
+    them changes anything. Only then does the search branch, on the open
+    cell with the fewest candidates, and the rules run again after every
+    guess. Per-rule firings and time for the last solve are kept in
+    `stats` as {rule: [fires, seconds]}. If on_progress is set it is called
+    with the node count every progress_every search nodes."""
+
+    def __init__(self, k=3, rng=None, rules=RULES):
+        unknown = set(rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown rule(s): {', '.join(sorted(unknown))}")
+        self.k = k
+        self.n = k * k
+        self.units, self.cell_units, self.peers = grid_geometry(k)
+        self.rows = self.units[:self.n]
+        self.cols = self.units[self.n:2*self.n]
+        self.intersections = _intersections(k)
+        self.full = (1 << self.n) - 1
+        self.nodes = 0
+        # optional random.Random: branch on digits in random order (grid generation)
+        self.rng = rng
+        self.on_progress = None
+        self.progress_every = 1000
+        self.rules = tuple(name for name in RULES if name in rules)
+        self._naked = "naked_single" in self.rules
+        self._pipeline = [(name, getattr(self, "_" + name))
+                          for name in self.rules if name != "naked_single"]
+        # with naked singles off, open cells may hold a single candidate
+        self._min_branch = 2 if self._naked else 1
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.nodes = 0
+        self.stats = {name: [0, 0.0] for name in self.rules}
+
+    def solve(self, b):
+        """Solve board b (Grid or list of rows, 0 = empty) in place. Returns True on success."""
+        self.reset_stats()
+        state = self._start(b)
+        if state is None:
+            return False
+        result = self._search(*state)
+        if result is None:
+            return False
+        _store_values(b, [mask.bit_length() for mask in result])
+        return True
+
+    def count_solutions(self, b, limit=2):
+        """Number of solutions of b, counting no further than limit."""
+        self.reset_stats()
+        state = self._start(b)
+        if state is None:
+            return 0
+        return self._count(*state, limit)
+
+    def candidates(self, b):
+        """Propagated candidate masks for b, or None if b is contradictory."""
+        state = self._start(b)
+        return None if state is None else state[0]
+
+    def _start(self, b):
+        n = self.n
+        cand = [self.full] * (n*n)
+        placed = [False] * (n*n)
+        queue = []
+        for i, v in enumerate(_flat_values(b)):
+            if v:
+                self._place(cand, placed, queue, i, 1 << (v - 1))
+        try:
+            self._propagate(cand, placed, queue)
+        except _Contradiction:
+            return None
+        return cand, placed
+
+    # --- propagation ---
+    def _place(self, cand, placed, queue, i, bit):
+        cand[i] = bit
+        placed[i] = True
+        queue.append(i)
+
+    def _remove(self, cand, placed, queue, i, bits):
+        # drop bits from cell i; returns True if anything was removed
+        c = cand[i]
+        if not c & bits:
+            return False
+        c &= ~bits
+        if not c:
+            raise _Contradiction
+        cand[i] = c
+        if self._naked and not c & (c - 1) and not placed[i]:
+            self._place(cand, placed, queue, i, c)
+            self.stats["naked_single"][0] += 1
+        return True
+
+    def _propagate(self, cand, placed, queue):
+        stats = self.stats
+        while True:
+            start = perf_counter()
+            self._drain(cand, placed, queue)
+            if self._naked:
+                stats["naked_single"][1] += perf_counter() - start
+            for name, rule in self._pipeline:
+                start = perf_counter()
+                fired = rule(cand, placed, queue)
+                entry = stats[name]
+                entry[1] += perf_counter() - start
+                if fired:
+                    entry[0] += fired
+                    break
+            else:
+                return
+
+    def _drain(self, cand, placed, queue):
+        # remove every newly placed digit from its peers (naked singles cascade here)
+        peers, naked = self.peers, self._naked
+        fired = 0
+        while queue:
+            i = queue.pop()
+            bit = cand[i]
+            for p in peers[i]:
+                c = cand[p]
+                if c & bit:
+                    c &= ~bit
+                    if not c:
+                        raise _Contradiction
+                    cand[p] = c
+                    if naked and not c & (c - 1):
+                        placed[p] = True
+                        queue.append(p)
+                        fired += 1
+        if fired:
+            self.stats["naked_single"][0] += fired
+
+    # --- deduction rules: each returns how many cells it changed ---
+    def _hidden_single(self, cand, placed, queue):
+        fired = 0
+        for unit in self.units:
+            once = more = 0
+            for j in unit:
+                c = cand[j]
+                more |= once & c
+                once |= c
+            if once != self.full:
+                raise _Contradiction
+            hidden = once & ~more
+            if hidden:
+                for j in unit:
+                    h = cand[j] & hidden
+                    if h and not placed[j]:
+                        if h & (h - 1):
+                            raise _Contradiction
+                        self._place(cand, placed, queue, j, h)
+                        fired += 1
+        return fired
+
+    def _locked_candidates(self, cand, placed, queue):
+        # pointing: a digit confined to one line inside a box leaves the rest of the line;
+        # claiming: a digit confined to one box inside a line leaves the rest of the box
+        fired = 0
+        for inter, box_rest, line_rest in self.intersections:
+            m = br = lr = 0
+            for j in inter:
+                m |= cand[j]
+            for j in box_rest:
+                br |= cand[j]
+            for j in line_rest:
+                lr |= cand[j]
+            pointing = m & lr & ~br
+            claiming = m & br & ~lr
+            if pointing:
+                for j in line_rest:
+                    if self._remove(cand, placed, queue, j, pointing):
+                        fired += 1
+            if claiming:
+                for j in box_rest:
+                    if self._remove(cand, placed, queue, j, claiming):
+                        fired += 1
+        return fired
+
+    def _naked_pair(self, cand, placed, queue):
+        fired = 0
+        for unit in self.units:
+            seen = {}
+            for j in unit:
+                c = cand[j]
+                rest = c & (c - 1)
+                if placed[j] or not rest or rest & (rest - 1):
+                    continue
+                if c not in seen:
+                    seen[c] = j
+                    continue
+                pair = (seen[c], j)
+                for x in unit:
+                    if x not in pair and self._remove(cand, placed, queue, x, c):
+                        fired += 1
+        return fired
+
+    def _hidden_pair(self, cand, placed, queue):
+        fired = 0
+        for unit in self.units:
+            seen = {}
+            for d in range(self.n):
+                bit = 1 << d
+                where = [j for j in unit if cand[j] & bit]
+                if len(where) != 2:
+                    continue
+                key = (where[0], where[1])
+                if key not in seen:
+                    seen[key] = bit
+                    continue
+                others = self.full & ~(seen[key] | bit)
+                for j in key:
+                    if self._remove(cand, placed, queue, j, others):
+                        fired += 1
+        return fired
+
+    def _x_wing(self, cand, placed, queue):
+        fired = 0
+        for d in range(self.n):
+            bit = 1 << d
+            for lines, cross in ((self.rows, self.cols), (self.cols, self.rows)):
+                seen = {}
+                for li, line in enumerate(lines):
+                    where = [x for x, j in enumerate(line) if cand[j] & bit]
+                    if len(where) != 2:
+                        continue
+                    key = (where[0], where[1])
+                    if key not in seen:
+                        seen[key] = li
+                        continue
+                    wing = (seen[key], li)
+                    for x in key:
+                        for y, j in enumerate(cross[x]):
+                            if y not in wing and self._remove(cand, placed, queue, j, bit):
+                                fired += 1
+        return fired
+
+    # --- search ---
+    def _branch_cell(self, cand, placed):
+        # open cell with the fewest candidates; -1 when every cell is placed
+        best, best_count = -1, self.n + 1
+        for i, c in enumerate(cand):
+            if not placed[i]:
+                count = bin(c).count("1")
+                if count < best_count:
+                    best, best_count = i, count
+                    if count <= self._min_branch:
+                        break
+        return best
+
+    def _branch_bits(self, mask):
+        bits = []
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            bits.append(bit)
+        if self.rng is not None:
+            self.rng.shuffle(bits)
+        return bits
+
+    def _guess(self, cand, placed, i, bit):
+        trial, trial_placed = cand[:], placed[:]
+        queue = []
+        self._place(trial, trial_placed, queue, i, bit)
+        try:
+            self._propagate(trial, trial_placed, queue)
+        except _Contradiction:
+            return None
+        return trial, trial_placed
+
+    def _tick(self):
+        self.nodes += 1
+        if self.on_progress is not None and self.nodes % self.progress_every == 0:
+            self.on_progress(self.nodes)
+
+    def _search(self, cand, placed):
+        self._tick()
+        best = self._branch_cell(cand, placed)
+        if best < 0:
+            return cand
+        for bit in self._branch_bits(cand[best]):
+            state = self._guess(cand, placed, best, bit)
+            if state is not None:
+                result = self._search(*state)
+                if result is not None:
+                    return result
+        return None
+
+    def _count(self, cand, placed, limit):
+        self._tick()
+        best = self._branch_cell(cand, placed)
+        if best < 0:
+            return 1
+        found = 0
+        for bit in self._branch_bits(cand[best]):
+            state = self._guess(cand, placed, best, bit)
+            if state is not None:
+                found += self._count(*state, limit - found)
+                if found >= limit:
+                    break
+        return found
+
+
+class BacktrackSolver:
+    """Plain backtracking: first empty cell, digits in order, no propagation.
+    Kept as the reference engine; same interface as PropagationSolver."""
+
+    def __init__(self, k=3):
+        self.k = k
+        self.n = k * k
+        self.nodes = 0
+        self.on_progress = None
+        self.progress_every = 1000
+
+    def solve(self, b):
+        """Solve board b (Grid or list of rows) in place. Returns True on success."""
+        self.nodes = 0
+        if isinstance(b, Grid):
+            rows = b.to_rows()
+            solved = self._backtrack(rows)
+            if solved:
+                _store_values(b, [v for row in rows for v in row])
+            return solved
+        return self._backtrack(b)
+
+    def _backtrack(self, b):
+        self.nodes += 1
+        if self.on_progress is not None and self.nodes % self.progress_every == 0:
+            self.on_progress(self.nodes)
+        empty = self.find_empty(b)
+        if not empty:
+            return True
+        r, c = empty
+        for num in range(1, self.n + 1):
+            if self.is_safe(b, r, c, num):
+                b[r][c] = num
+                if self._backtrack(b):
+                    return True
+                b[r][c] = 0
+        return False
+
+    def find_empty(self, b):
+        for r in range(self.n):
+            for c in range(self.n):
+                if b[r][c] == 0:
+                    return (r, c)
+        return None
+
+    def is_safe(self, b, r, c, num):
+        n, k = self.n, self.k
+        if any(b[r][i] == num for i in range(n)): return False
+        if any(b[i][c] == num for i in range(n)): return False
+        br, bc = r//k*k, c//k*k
+        for i in range(k):
+            for j in range(k):
+                if b[br+i][bc+j] == num: return False
+        return True
+
+
+def solve_worker(board, k, out):
+    """Process entry point for background solves. Puts ("progress", nodes)
+    messages on the queue out while searching, then ("done", board or None,
+    nodes)."""
+    solver = PropagationSolver(k)
+    solver.on_progress = lambda nodes: out.put(("progress", nodes))
+    solved = solver.solve(board)
+    out.put(("done", board if solved else None, solver.nodes))
+
+
+def rule_report(boards, k=3):
+    """Solve every board with all rules on, then with each rule switched off.
+
+    Returns one row per rule: (rule, fires, seconds, nodes, total_seconds,
+    nodes_without, seconds_without). fires/seconds are the rule's own share
+    with the full pipeline, nodes/total_seconds cover the full-pipeline run
+    and nodes_without - nodes is the search the rule saves."""
+    def run(rules):
+        solver = PropagationSolver(k, rules=rules)
+        totals = {name: [0, 0.0] for name in rules}
+        nodes, start = 0, perf_counter()
+        for b in boards:
+            solver.solve([row[:] for row in b])
+            nodes += solver.nodes
+            for name, (fires, secs) in solver.stats.items():
+                totals[name][0] += fires
+                totals[name][1] += secs
+        return totals, nodes, perf_counter() - start
+
+    totals, nodes, total_secs = run(RULES)
+    rows = []
+    for name in RULES:
+        _, nodes_without, secs_without = run([r for r in RULES if r != name])
+        fires, secs = totals[name]
+        rows.append((name, fires, secs, nodes, total_secs, nodes_without, secs_without))
+    return rows
+
+
+class _CacheHit(Exception):
+    # raised from on_progress to abandon a search the cache can answer
+    pass
+
+
+def solve_cached(grid, cache, solver):
+    """Solution of grid (Grid or list of rows) or None, using cache (a
+    SolutionCache). The exact grid is looked up first. The canonical lookup
+    is made only once the search reaches cache.canonical_nodes nodes, and
+    only puzzles that hard are stored under their canonical form."""
+    b = grid.to_rows()
+    solved = cache.get(b, grid.k)
+    if solved is not None:
+        return solved
+
+    def on_progress(nodes):
+        if nodes == cache.canonical_nodes:
+            hit = cache.get(b, grid.k, canonical=True)
+            if hit is not None:
+                raise _CacheHit(hit)
+
+    solved = grid.copy()
+    saved = solver.on_progress, solver.progress_every
+    solver.on_progress, solver.progress_every = on_progress, cache.canonical_nodes
+    try:
+        if not solver.solve(solved):
+            return None
+    except _CacheHit as e:
+        return e.args[0]
+    finally:
+        solver.on_progress, solver.progress_every = saved
+    cache.put(b, solved.to_rows(), grid.k, canonical=solver.nodes >= cache.canonical_nodes)
+    return solved
+
+
+def solve_batch(puzzles, k=3, cache=None, solver=None):
+    """Yield (puzzle string, solution string or None) for each puzzle string,
+    consulting cache (a SolutionCache, see solve_cached) if given."""
+    solver = solver or PropagationSolver(k)
+    for text in puzzles:
+        grid = Grid.from_string(text)
+        if grid.k != solver.k:
+            solver = PropagationSolver(grid.k)
+        if cache is not None:
+            solved = solve_cached(grid, cache, solver)
+        else:
+            solved = grid.copy()
+            if not solver.solve(solved):
+                solved = None
+        yield text, (board_to_string(solved) if solved else None)
+
+
+def print_rule_report(path, k=3):
+    # first token of each non-empty line is a puzzle string
+    with open(path) as f:
+        boards = [board_from_string(line.split()[0])[0] for line in f if line.strip()]
+    print(f"{len(boards)} puzzles from {path}")
+    print(f"{'rule':<18}{'fires':>8}{'ms':>10}{'nodes':>8}{'ms total':>10}"
+          f"{'nodes w/o':>11}{'ms w/o':>10}")
+    for name, fires, secs, nodes, total, nodes_wo, secs_wo in rule_report(boards, k):
+        print(f"{name:<18}{fires:>8}{secs*1000:>10.1f}{nodes:>8}{total*1000:>10.1f}"
+              f"{nodes_wo:>11}{secs_wo*1000:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Sudoku solving.")
+    parser.add_argument("--box", type=int, choices=BOX_SIZES, default=3,
+                        help="box size k (3 = 9x9)")
+    parser.add_argument("--rule-report", metavar="FILE",
+                        help="print per-rule firings, time and search saved over a puzzle file")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="solve every puzzle in FILE, printing 'puzzle solution' lines")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="keep solutions in this cache file (default: no cache)")
+    parser.add_argument("--cache-size", type=int, default=100000,
+                        help="entries kept before least recently used ones are evicted")
+    args = parser.parse_args(argv)
+    if args.rule_report:
+        print_rule_report(args.rule_report, args.box)
+    elif args.batch:
+        cache = None
+        if args.cache:
+            # only batch runs need the cache (and sqlite3)
+            from Sudoku_cache import SolutionCache
+            cache = SolutionCache(args.cache, args.cache_size)
+        with open(args.batch) as f:
+            puzzles = [line.split()[0] for line in f if line.strip()]
+        for puzzle, solution in solve_batch(puzzles, args.box, cache):
+            print(puzzle, solution or "unsolvable")
+        if cache is not None:
+            print(f"cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Sudoku puzzle generator
+-----------------------
+Builds a random full grid, then removes clues (in symmetric pairs) for as
+long as the uniqueness check still finds exactly one solution. Each puzzle
+is rated by technique level: the hardest deduction rule the propagation
+solver needed, or "expert" if it still had to guess. The node count of
+the solve-and-prove-unique search is written alongside as a finer effort
+measure.
+
+Generation runs on a process pool until every difficulty band has its
+target count; puzzles are written to the output file as they arrive:
+
+    <puzzle> <solution> <band> <nodes>
+
+Example:
+    python Sudoku_generator.py puzzles.txt --easy 50 --hard 20 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from Sudoku_core import PropagationSolver, board_to_string
+
+# (band, rules that put a puzzle in it) -- a puzzle belongs to the hardest
+# band whose rules fired; "expert" puzzles needed search on top of every rule
+BANDS = [
+    ("easy", ("naked_single", "hidden_single")),
+    ("medium", ("locked_candidates", "naked_pair", "hidden_pair")),
+    ("hard", ("x_wing",)),
+    ("expert", ()),
+]
+
+
+def rate(nodes, stats):
+    """Band for a puzzle from a full-pipeline solve's node count and rule stats."""
+    if nodes > 1:
+        return BANDS[-1][0]
+    band = BANDS[0][0]
+    for name, rules in BANDS:
+        if any(stats.get(rule, (0,))[0] for rule in rules):
+            band = name
+    return band
+
+
+def full_grid(k, rng):
+    """A random completely filled valid grid of box size k."""
+    n = k * k
+    grid = [[0] * n for _ in range(n)]
+    PropagationSolver(k, rng=rng).solve(grid)
+    return grid
+
+
+def make_puzzle(k, rng, symmetric=True):
+    """Return (puzzle, solution) where puzzle has a unique solution and no
+    clue (or symmetric clue pair) can be removed without losing that."""
+    n = k * k
+    solution = full_grid(k, rng)
+    puzzle = [row[:] for row in solution]
+    checker = PropagationSolver(k)
+    cells = list(range(n * n))
+    rng.shuffle(cells)
+    for i in cells:
+        r, c = divmod(i, n)
+        pr, pc = (n - 1 - r, n - 1 - c) if symmetric else (r, c)
+        if puzzle[r][c] == 0:
+            continue
+        saved = puzzle[r][c], puzzle[pr][pc]
+        puzzle[r][c] = puzzle[pr][pc] = 0
+        if checker.count_solutions(puzzle, 2) != 1:
+            puzzle[r][c], puzzle[pr][pc] = saved
+    return puzzle, solution
+
+
+def _generate_one(args):
+    # worker entry point: one seeded puzzle, returned as strings
+    k, seed, symmetric = args
+    rng = random.Random(seed)
+    puzzle, solution = make_puzzle(k, rng, symmetric)
+    checker = PropagationSolver(k)
+    checker.count_solutions(puzzle, 2)
+    return (board_to_string(puzzle), board_to_string(solution),
+            rate(checker.nodes, checker.stats), checker.nodes)
+
+
+def generate(out_path, targets, k=3, workers=None, seed=None, symmetric=True,
+             max_attempts=None, log=None):
+    """Generate puzzles on a process pool until every band in targets
+    (band -> count) is filled, streaming each accepted puzzle to out_path.
+    Returns the per-band counts written."""
+    unknown = set(targets) - {name for name, _ in BANDS}
+    if unknown:
+        raise ValueError(f"Unknown difficulty band(s): {', '.join(sorted(unknown))}")
+    workers = workers or os.cpu_count() or 1
+    seeds = random.Random(seed)
+    counts = {name: 0 for name in targets}
+    attempts = 0
+    start = time.time()
+
+    def remaining():
+        return any(counts[b] < targets[b] for b in targets)
+
+    with open(out_path, "w") as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        def submit():
+            nonlocal attempts
+            attempts += 1
+            pending.add(pool.submit(_generate_one, (k, seeds.getrandbits(64), symmetric)))
+
+        # keep a couple of jobs per worker in flight
+        for _ in range(workers * 2):
+            submit()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                puzzle, solution, band, nodes = fut.result()
+                if band in counts and counts[band] < targets[band]:
+                    counts[band] += 1
+                    out.write(f"{puzzle} {solution} {band} {nodes}\n")
+                    out.flush()
+                    if log:
+                        log(f"{band:<7} {sum(counts.values())} written, {attempts} tried, "
+                            f"{time.time() - start:.1f}s")
+            if not remaining():
+                for fut in pending:
+                    fut.cancel()
+                break
+            if max_attempts is None or attempts < max_attempts:
+                while len(pending) < workers * 2:
+                    submit()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate rated Sudoku puzzles.")
+    parser.add_argument("out", help="output file (one puzzle per line)")
+    for name, _ in BANDS:
+        parser.add_argument(f"--{name}", type=int, default=0, metavar="N",
+                            help=f"number of {name} puzzles")
+    parser.add_argument("--box", type=int, default=3, help="box size k (3 = 9x9, 4 = 16x16)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-attempts", type=int, default=None,
+                        help="stop after this many candidate puzzles")
+    parser.add_argument("--no-symmetry", action="store_true",
+                        help="remove clues one at a time instead of in symmetric pairs")
+    args = parser.parse_args(argv)
+
+    targets = {name: getattr(args, name) for name, _ in BANDS if getattr(args, name) > 0}
+    if not targets:
+        parser.error("ask for at least one band, e.g. --easy 10")
+    counts = generate(args.out, targets, k=args.box, workers=args.workers, seed=args.seed,
+                      symmetric=not args.no_symmetry, max_attempts=args.max_attempts,
+                      log=lambda msg: print(msg, file=sys.stderr))
+    short = {b: targets[b] - counts[b] for b in targets if counts[b] < targets[b]}
+    if short:
+        print(f"Stopped before filling: {short}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
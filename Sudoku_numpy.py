@@ -0,0 +1,94 @@
+"""
+Vectorized Sudoku checks
+------------------------
+validate_batch takes an (M, N, N) uint8 array (0 = empty; N = 9, 16 or 25)
+and checks every grid at once with whole-array NumPy operations, no Python
+loop per grid or per cell. Each cell becomes an N-bit mask; OR-reducing a
+unit and comparing its popcount with the number of filled cells finds
+duplicates, and the complement of the row | column | box masks gives every
+cell's candidates.
+
+    grids = grids_from_strings(lines)
+    result = validate_batch(grids)
+    bad = np.flatnonzero(~result.valid)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+BatchResult = namedtuple("BatchResult", [
+    "row_conflicts",   # (M, N) bool: row r holds a repeated digit
+    "col_conflicts",   # (M, N) bool: column c holds a repeated digit
+    "box_conflicts",   # (M, N) bool: box b (row-major) holds a repeated digit
+    "valid",           # (M,) bool: no conflicts and every value in 0..N
+    "solved",          # (M,) bool: valid and completely filled
+    "candidates",      # (M, N, N) uint16 (uint32 for 25x25): bit d-1 set if
+                       # digit d fits; 0 for filled cells
+])
+
+ALL_DIGITS = np.uint16(0x1FF)
+
+# value -> bit (values above N are masked out and reported through `valid`)
+_BIT = np.zeros(256, dtype=np.uint32)
+_BIT[1:26] = 1 << np.arange(25, dtype=np.uint32)
+
+# popcount of every 16-bit mask; wider masks are looked up a half at a time
+_POPCOUNT = np.array([bin(m).count("1") for m in range(1 << 16)], dtype=np.uint8)
+
+
+def _popcount(masks):
+    count = _POPCOUNT[masks & 0xFFFF]
+    if masks.dtype.itemsize > 2:
+        count = count + _POPCOUNT[masks >> 16]
+    return count
+
+
+def _boxes(a, k):
+    # (M, N, N) -> (M, N boxes, N cells), boxes and cells in row-major order
+    m, n = a.shape[0], k * k
+    return a.reshape(m, k, k, k, k).transpose(0, 1, 3, 2, 4).reshape(m, n, n)
+
+
+def validate_batch(grids):
+    """Check an (M, N, N) uint8 array of grids; returns a BatchResult."""
+    grids = np.asarray(grids, dtype=np.uint8)
+    n = grids.shape[1] if grids.ndim == 3 else 0
+    k = round(n ** 0.5)
+    if grids.ndim != 3 or grids.shape[2] != n or n not in (9, 16, 25):
+        raise ValueError(f"expected an (M, N, N) array with N = 9, 16 or 25, got shape {grids.shape}")
+    m = grids.shape[0]
+    dtype = np.uint16 if n <= 16 else np.uint32
+    bits = np.where(grids <= n, _BIT[grids], 0).astype(dtype)
+    filled = (grids > 0).astype(np.uint8)
+
+    row_or = np.bitwise_or.reduce(bits, axis=2)
+    col_or = np.bitwise_or.reduce(bits, axis=1)
+    box_or = np.bitwise_or.reduce(_boxes(bits, k), axis=2)
+
+    row_conflicts = _popcount(row_or) != filled.sum(axis=2)
+    col_conflicts = _popcount(col_or) != filled.sum(axis=1)
+    box_conflicts = _popcount(box_or) != _boxes(filled, k).sum(axis=2)
+
+    valid = ~(row_conflicts.any(axis=1) | col_conflicts.any(axis=1) | box_conflicts.any(axis=1))
+    valid &= (grids <= n).all(axis=(1, 2))
+    solved = valid & filled.all(axis=(1, 2)).astype(bool)
+
+    box_cells = np.broadcast_to(box_or.reshape(m, k, 1, k, 1), (m, k, k, k, k)).reshape(m, n, n)
+    used = row_or[:, :, None] | col_or[:, None, :] | box_cells
+    full = dtype((1 << n) - 1)
+    candidates = np.where(filled.astype(bool), dtype(0), ~used & full).astype(dtype)
+
+    return BatchResult(row_conflicts, col_conflicts, box_conflicts, valid, solved, candidates)
+
+
+def grids_from_strings(lines):
+    """Stack 81-character grid strings ('.' or '0' = empty) into an (M, 9, 9) uint8 array."""
+    raw = np.frombuffer("".join(lines).encode("ascii"), dtype=np.uint8)
+    if raw.size % 81:
+        raise ValueError("every grid string must be exactly 81 characters")
+    values = raw - ord("0")
+    values[raw == ord(".")] = 0
+    if (values > 9).any():
+        raise ValueError("grid strings may only contain digits and '.'")
+    return values.reshape(-1, 9, 9)
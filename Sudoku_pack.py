@@ -0,0 +1,377 @@
+"""
+Packed binary Sudoku corpora
+----------------------------
+A compact, memory-mapped alternative to puzzle text files for corpora of
+millions of grids. Cells are stored as 4-bit values, two per byte, so a
+9x9 grid takes 41 bytes instead of an 82-byte text line. 16x16 and 25x25
+grids have values above 15 and use one byte per cell. Every record has
+the same size, so record i sits at a computed offset: readers seek
+directly, and workers split a file by byte range without scanning it.
+
+PackedCorpus maps the file and unpacks records from the mapping into a
+Grid's cell buffer, with no strings or parsing on the way. A 4-bit
+record is copied once on the way, into a small bytes object, because
+bytes.translate does not read from a memoryview. A batch job starts
+without reading the file and touches only the pages it uses.
+
+File layout (little-endian):
+
+    header   b"SDKP", version u16, box size k u8, bits per cell u8,
+             records u64, index offset u64 (0 = no index)
+    records  records x record size bytes; 4-bit cells pack the even cell
+             in the high nibble
+    index    entries u32, then per entry: name length u16, name (UTF-8),
+             first record u64, records u64
+
+The optional index names runs of records, e.g. the [corpus] sections of
+Sudoku_corpora.txt.
+
+Examples:
+    python Sudoku_pack.py pack Sudoku_corpora.txt corpora.sdkp
+    python Sudoku_pack.py unpack corpora.sdkp corpora.txt
+    python Sudoku_pack.py info corpora.sdkp
+    python Sudoku_pack.py solve corpora.sdkp --workers 4
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Sudoku_core import BOX_SIZES, Grid, PropagationSolver
+
+MAGIC = b"SDKP"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBQQ")
+INDEX_COUNT = struct.Struct("<I")
+INDEX_NAME = struct.Struct("<H")
+INDEX_RANGE = struct.Struct("<QQ")
+
+# byte -> high / low nibble, and value -> value in the high nibble
+_HIGH = bytes(b >> 4 for b in range(256))
+_LOW = bytes(b & 15 for b in range(256))
+_SHIFT = bytes((b << 4) & 0xFF for b in range(256))
+
+
+def cell_bits(k):
+    """Bits per cell for box size k: 4 while every value fits in a nibble."""
+    return 4 if k * k <= 15 else 8
+
+
+def record_size(k):
+    cells = k ** 4
+    return (cells + 1) // 2 if cell_bits(k) == 4 else cells
+
+
+def pack_cells(cells, k=3):
+    """Record bytes for a flat sequence of k**4 cell values (0 = empty)."""
+    cells = bytes(cells)
+    if len(cells) != k ** 4:
+        raise ValueError(f"a box size {k} grid has {k ** 4} cells, not {len(cells)}")
+    if cells and max(cells) > k * k:
+        raise ValueError(f"cell values must be 0..{k * k}")
+    if cell_bits(k) == 8:
+        return cells
+    size = record_size(k)
+    high = cells[0::2].translate(_SHIFT)
+    low = cells[1::2].ljust(size, b"\0")
+    return (int.from_bytes(high, "big") | int.from_bytes(low, "big")).to_bytes(size, "big")
+
+
+def unpack_into(record, cells, k=3):
+    """Write a record's cell values into the bytearray cells (k**4 long).
+    A 4-bit record is copied to bytes first (record_size bytes) for
+    translate()."""
+    if cell_bits(k) == 8:
+        cells[:] = record
+    else:
+        record = bytes(record)
+        cells[0::2] = record.translate(_HIGH)
+        cells[1::2] = record.translate(_LOW)[:len(cells) // 2]
+
+
+class CorpusWriter:
+    """Streams grids into a packed corpus; use as a context manager or
+    close() to write the index and header. The file appears under its name
+    only once complete."""
+
+    def __init__(self, path, k=3):
+        if k not in BOX_SIZES:
+            raise ValueError(f"box size must be one of {BOX_SIZES}")
+        self.path = path
+        self.k = k
+        self.count = 0
+        self.sections = []  # [name, first record, records]
+        self.tmp = path + ".tmp"
+        self.file = open(self.tmp, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, k, cell_bits(k), 0, 0))
+
+    def section(self, name):
+        """Start a named run of records; it lasts until the next section."""
+        self._end_section()
+        self.sections.append([name, self.count, 0])
+
+    def _end_section(self):
+        if self.sections:
+            self.sections[-1][2] = self.count - self.sections[-1][1]
+
+    def write(self, grid):
+        """Append a Grid, a grid string or a flat sequence of cell values."""
+        if isinstance(grid, str):
+            grid = Grid.from_string(grid)
+        if isinstance(grid, Grid):
+            if grid.k != self.k:
+                raise ValueError(f"box size {grid.k} grid in a box size {self.k} corpus")
+            grid = grid.cells
+        self.file.write(pack_cells(grid, self.k))
+        self.count += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        self._end_section()
+        index_offset = 0
+        if self.sections:
+            index_offset = self.file.tell()
+            self.file.write(INDEX_COUNT.pack(len(self.sections)))
+            for name, first, count in self.sections:
+                raw = name.encode("utf-8")
+                self.file.write(INDEX_NAME.pack(len(raw)) + raw + INDEX_RANGE.pack(first, count))
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.k, cell_bits(self.k), self.count, index_offset))
+        self.file.close()
+        self.file = None
+        os.replace(self.tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmp)
+
+
+class PackedCorpus:
+    """Read-only, memory-mapped packed corpus.
+
+    grids() yields one Grid whose buffer is refilled for every record;
+    copy() it to keep a grid. sections maps index names to ranges of
+    record numbers."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.k, bits, self.count, index_offset = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} packed Sudoku corpus")
+            if self.k not in BOX_SIZES or bits != cell_bits(self.k):
+                raise ValueError(f"{path}: unsupported box size {self.k} / {bits} bits per cell")
+            self.record_size = record_size(self.k)
+            self.end = HEADER.size + self.count * self.record_size
+            if len(self.map) < self.end or (index_offset and index_offset < self.end):
+                raise ValueError(f"{path} is truncated")
+            self.sections = self._read_index(index_offset) if index_offset else {}
+        except (ValueError, struct.error):
+            self.map.close()
+            raise
+        self.view = memoryview(self.map)
+
+    def _read_index(self, offset):
+        sections = {}
+        (entries,) = INDEX_COUNT.unpack_from(self.map, offset)
+        offset += INDEX_COUNT.size
+        for _ in range(entries):
+            (length,) = INDEX_NAME.unpack_from(self.map, offset)
+            offset += INDEX_NAME.size
+            name = self.map[offset:offset + length].decode("utf-8")
+            offset += length
+            first, count = INDEX_RANGE.unpack_from(self.map, offset)
+            offset += INDEX_RANGE.size
+            sections[name] = range(first, first + count)
+        return sections
+
+    def __len__(self):
+        return self.count
+
+    def offset(self, i):
+        """Byte offset of record i."""
+        return HEADER.size + i * self.record_size
+
+    def record(self, i):
+        """Record i as a memoryview into the mapping (no copy)."""
+        if not 0 <= i < self.count:
+            raise IndexError(f"record {i} of {self.count}")
+        start = self.offset(i)
+        return self.view[start:start + self.record_size]
+
+    def grid(self, i, into=None):
+        """Grid i, unpacked into the Grid into if given."""
+        into = into if into is not None else Grid(self.k)
+        unpack_into(self.record(i), into.cells, self.k)
+        return into
+
+    def grids(self, start=0, stop=None, into=None):
+        """Yield records start..stop-1, each unpacked into the same Grid."""
+        stop = self.count if stop is None else min(stop, self.count)
+        into = into if into is not None else Grid(self.k)
+        cells, k, size, view = into.cells, self.k, self.record_size, self.view
+        pos = self.offset(start)
+        for _ in range(start, stop):
+            unpack_into(view[pos:pos + size], cells, k)
+            pos += size
+            yield into
+
+    def records_in(self, lo, hi):
+        """Range of the records starting in the byte range lo..hi-1. Splitting
+        the file at any byte offsets gives every record to exactly one part."""
+        size = self.record_size
+        first = max(0, -(-(lo - HEADER.size) // size))
+        last = max(0, -(-(hi - HEADER.size) // size))
+        return range(min(first, self.count), min(last, self.count))
+
+    def shards(self, parts, records=None):
+        """(lo, hi) byte ranges splitting the records (all, or a range of
+        record numbers) into parts pieces; see records_in."""
+        records = range(self.count) if records is None else records
+        lo, hi = self.offset(records.start), self.offset(records.stop)
+        return [(lo + (hi - lo) * p // parts, lo + (hi - lo) * (p + 1) // parts)
+                for p in range(parts)]
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+
+def read_text(path):
+    """Yield (section name or None, grid string) from a puzzle text file:
+    one puzzle per line (first token), '#' comments and Sudoku_corpora.txt
+    style [section] headers."""
+    section = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1]
+                continue
+            yield section, line.split()[0]
+
+
+def text_to_packed(text_path, out_path, k=3):
+    """Pack a puzzle text file; returns the number of grids written."""
+    with CorpusWriter(out_path, k) as writer:
+        current = None
+        for section, text in read_text(text_path):
+            if section != current:
+                if section is not None:
+                    writer.section(section)
+                current = section
+            writer.write(text)
+    return writer.count
+
+
+def packed_to_text(path, out_path):
+    """Write a packed corpus as text, sections as [name] headers; returns
+    the number of grids written."""
+    corpus = PackedCorpus(path)
+    try:
+        starts = {r.start: name for name, r in corpus.sections.items() if len(r)}
+        with open(out_path, "w") as out:
+            for i, grid in enumerate(corpus.grids()):
+                if i in starts:
+                    out.write(f"[{starts[i]}]\n")
+                out.write(grid.to_string() + "\n")
+        return corpus.count
+    finally:
+        corpus.close()
+
+
+def _solve_shard(args):
+    # worker entry point: solve the records starting in one byte range
+    path, lo, hi = args
+    corpus = PackedCorpus(path)
+    try:
+        records = corpus.records_in(lo, hi)
+        solver = PropagationSolver(corpus.k)
+        solved = nodes = 0
+        # the solver fills in the shared buffer, which the next record overwrites
+        for grid in corpus.grids(records.start, records.stop):
+            solved += solver.solve(grid)
+            nodes += solver.nodes
+        return len(records), solved, nodes
+    finally:
+        corpus.close()
+
+
+def solve_corpus(path, workers=None, section=None):
+    """Solve every grid (or one section's) on a process pool, one byte range
+    per worker. Returns (grids, solved, nodes, seconds)."""
+    corpus = PackedCorpus(path)
+    try:
+        records = corpus.sections[section] if section is not None else None
+        workers = workers or os.cpu_count() or 1
+        jobs = [(path, lo, hi) for lo, hi in corpus.shards(workers, records)]
+    finally:
+        corpus.close()
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_solve_shard, jobs))
+    grids = sum(r[0] for r in results)
+    return grids, sum(r[1] for r in results), sum(r[2] for r in results), time.time() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Packed binary Sudoku corpora.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pack = sub.add_parser("pack", help="text puzzle file -> packed corpus")
+    pack.add_argument("text")
+    pack.add_argument("out")
+    pack.add_argument("--box", type=int, choices=BOX_SIZES, default=3, help="box size k (3 = 9x9)")
+    unpack = sub.add_parser("unpack", help="packed corpus -> text puzzle file")
+    unpack.add_argument("packed")
+    unpack.add_argument("out")
+    info = sub.add_parser("info", help="print a packed corpus' header and sections")
+    info.add_argument("packed")
+    solve = sub.add_parser("solve", help="solve a packed corpus on a process pool")
+    solve.add_argument("packed")
+    solve.add_argument("--workers", type=int, default=None)
+    solve.add_argument("--section", default=None, help="solve only this indexed section")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        count = text_to_packed(args.text, args.out, args.box)
+        print(f"packed {count} grids into {args.out} ({os.path.getsize(args.out)} bytes)")
+    elif args.command == "unpack":
+        count = packed_to_text(args.packed, args.out)
+        print(f"wrote {count} grids to {args.out}")
+    elif args.command == "info":
+        corpus = PackedCorpus(args.packed)
+        n = corpus.k * corpus.k
+        print(f"{args.packed}: {corpus.count} {n}x{n} grids, {corpus.record_size} bytes each")
+        for name, records in corpus.sections.items():
+            print(f"  [{name}] records {records.start}..{records.stop - 1} ({len(records)})")
+        corpus.close()
+    else:
+        try:
+            grids, solved, nodes, secs = solve_corpus(args.packed, args.workers, args.section)
+        except KeyError:
+            parser.error(f"no section {args.section!r} in {args.packed}")
+        rate = grids / secs if secs else 0.0
+        print(f"{solved}/{grids} solved, {nodes} nodes, {secs:.2f}s, {rate:.0f} grids/s")
+        if solved < grids:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
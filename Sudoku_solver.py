@@ -1,12 +1,27 @@
+import argparse
+import multiprocessing as mp
+import queue
 import tkinter as tk
+from time import perf_counter
 from tkinter import messagebox
 
+from Sudoku_cache import SolutionCache
+from Sudoku_core import BOX_SIZES, BacktrackSolver, ConflictTracker, find_conflicts, solve_worker
+
+
 class SudokuApp:
-    def __init__(self, root):
+    def __init__(self, root, box=3, cache=None):
         self.root = root
         self.root.title("Sudoku Solver (Dark Red Theme)")
-        self.entries = [[None for _ in range(9)] for _ in range(9)]
+        self.cache = cache  # SolutionCache consulted before any search, or None
+        self.k = box
+        self.n = box * box
+        self.grid_frame = None
+        self.size_var = None
         self.delay = 100  # ms delay for visualization
+        self.poll_ms = 100  # how often a background solve is checked
+        self.worker = None
+        self.worker_queue = None
         self.paused = False
         self.stop_visual = False
         self.create_styles()
@@ -17,26 +32,51 @@ class SudokuApp:
         self.bg_color = "#1c1c1c"   # dark background
         self.cell_bg = "#2a2a2a"    # cell background
         self.text_color = "#ff4c4c" # red hue for text
+        self.conflict_bg = "#6b1010" # cells clashing with a peer
         self.btn_bg = "#333333"
         self.btn_fg = "#ff6666"
 
         self.root.configure(bg=self.bg_color)
 
     def create_grid(self):
+        n, k = self.n, self.k
+        self.entries = [[None for _ in range(n)] for _ in range(n)]
+        self.vars = [[None for _ in range(n)] for _ in range(n)]
+        self.reset_model()
+        # shrink cells for the larger boards so 25x25 still fits on screen
+        font_size, ipady = {3: (20, 8), 4: (14, 4), 5: (10, 2)}.get(k, (10, 2))
         frame = tk.Frame(self.root, bg=self.bg_color)
-        frame.pack(padx=20, pady=20)
-        for r in range(9):
-            for c in range(9):
-                e = tk.Entry(frame, width=3, font=("Consolas", 20, "bold"),
+        if self.grid_frame is None:
+            frame.pack(padx=20, pady=20)
+        else:
+            frame.pack(padx=20, pady=20, before=self.grid_frame)
+            self.grid_frame.destroy()
+        self.grid_frame = frame
+        for r in range(n):
+            for c in range(n):
+                var = tk.StringVar()
+                var.trace_add("write", lambda *_, r=r, c=c: self.on_cell_edit(r, c))
+                self.vars[r][c] = var
+                e = tk.Entry(frame, width=3, font=("Consolas", font_size, "bold"),
                              justify="center", bg=self.cell_bg, fg=self.text_color,
-                             insertbackground=self.text_color, relief="solid")
-                e.grid(row=r, column=c, padx=2, pady=2, ipady=8)
-                if r % 3 == 0 and r != 0:
+                             insertbackground=self.text_color, relief="solid",
+                             textvariable=var)
+                e.grid(row=r, column=c, padx=2, pady=2, ipady=ipady)
+                if r % k == 0 and r != 0:
                     e.grid(pady=(10, 2))
-                if c % 3 == 0 and c != 0:
+                if c % k == 0 and c != 0:
                     e.grid(padx=(10, 2))
                 self.entries[r][c] = e
 
+    def set_size(self, label):
+        k = {f"{b*b}x{b*b}": b for b in BOX_SIZES}[label]
+        if k == self.k:
+            return
+        self.stop_visual = True
+        self.cancel_solve()
+        self.k, self.n = k, k * k
+        self.create_grid()
+
     def create_buttons(self):
         btn_frame = tk.Frame(self.root, bg=self.bg_color)
         btn_frame.pack(pady=10)
@@ -53,99 +93,181 @@ class SudokuApp:
         make_btn("Clear", self.clear).grid(row=0, column=4, padx=5)
         make_btn("Load Sample", self.load_sample).grid(row=0, column=5, padx=5)
 
+        self.size_var = tk.StringVar(value=f"{self.n}x{self.n}")
+        size_menu = tk.OptionMenu(btn_frame, self.size_var,
+                                  *[f"{b*b}x{b*b}" for b in BOX_SIZES], command=self.set_size)
+        size_menu.config(bg=self.btn_bg, fg=self.btn_fg, activebackground="#550000",
+                         activeforeground="white", font=("Arial", 12, "bold"),
+                         highlightthickness=0)
+        size_menu.grid(row=0, column=6, padx=5)
+
+        make_btn("Cancel", self.cancel_solve).grid(row=1, column=1, padx=5, pady=(8, 0))
+        tk.Label(btn_frame, text="Time limit (s):", bg=self.bg_color, fg=self.btn_fg,
+                 font=("Arial", 12, "bold")).grid(row=1, column=2, sticky="e", pady=(8, 0))
+        # 0 or blank = no limit
+        self.time_limit_var = tk.StringVar(value="0")
+        tk.Entry(btn_frame, textvariable=self.time_limit_var, width=6, justify="center",
+                 bg=self.cell_bg, fg=self.text_color, insertbackground=self.text_color,
+                 font=("Arial", 12, "bold")).grid(row=1, column=3, sticky="w", pady=(8, 0))
+        self.status_var = tk.StringVar(value="")
+        tk.Label(btn_frame, textvariable=self.status_var, bg=self.bg_color, fg=self.btn_fg,
+                 font=("Arial", 12)).grid(row=1, column=4, columnspan=3, sticky="w", pady=(8, 0))
+
+    # --- Board model (Sudoku_core), kept in sync with the entries via variable traces ---
+    def reset_model(self):
+        self.model = ConflictTracker(self.k)
+        self.engine = BacktrackSolver(self.k)
+
+    def parse_cell(self, text):
+        val = text.strip()
+        if val == "" or val == "0" or val == ".":
+            return 0
+        try:
+            v = int(val)
+        except:
+            return 0
+        return v if 1 <= v <= self.n else 0
+
+    def on_cell_edit(self, r, c):
+        for R, C in self.model.set(r, c, self.parse_cell(self.vars[r][c].get())):
+            self.paint_cell(R, C)
+
+    def paint_cell(self, r, c):
+        bg = self.conflict_bg if self.model.is_conflicting(r, c) else self.cell_bg
+        e = self.entries[r][c]
+        if e.cget("bg") != bg:
+            e.config(bg=bg)
+
+    def current_conflicts(self):
+        return self.model.conflicts()
+
     def read_board(self):
-        board = []
-        for r in range(9):
-            row = []
-            for c in range(9):
-                val = self.entries[r][c].get().strip()
-                if val == "" or val == "0" or val == ".":
-                    row.append(0)
-                else:
-                    try:
-                        row.append(int(val))
-                    except:
-                        row.append(0)
-            board.append(row)
-        return board
+        return self.model.grid.to_rows()
 
     def write_board(self, board):
-        for r in range(9):
-            for c in range(9):
+        for r in range(self.n):
+            for c in range(self.n):
                 self.entries[r][c].delete(0, tk.END)
                 if board[r][c] != 0:
                     self.entries[r][c].insert(0, str(board[r][c]))
 
     def validate(self):
-        board = self.read_board()
-        conflicts = self.find_conflicts(board)
+        conflicts = self.current_conflicts()
         if conflicts:
             messagebox.showerror("Validation Failed", "\n".join(conflicts))
         else:
             messagebox.showinfo("Validation", "No conflicts found. Grid looks valid.")
 
     def find_conflicts(self, b):
-        conflicts = []
-        for r in range(9):
-            seen = {}
-            for c in range(9):
-                v = b[r][c]
-                if v == 0: continue
-                if v in seen:
-                    conflicts.append(f"Row {r+1} has duplicate {v}")
-                else:
-                    seen[v] = True
-        for c in range(9):
-            seen = {}
-            for r in range(9):
-                v = b[r][c]
-                if v == 0: continue
-                if v in seen:
-                    conflicts.append(f"Column {c+1} has duplicate {v}")
-                else:
-                    seen[v] = True
-        for br in range(3):
-            for bc in range(3):
-                seen = {}
-                for r in range(3):
-                    for c in range(3):
-                        R, C = br*3+r, bc*3+c
-                        v = b[R][C]
-                        if v == 0: continue
-                        if v in seen:
-                            conflicts.append(f"Box {br*3+bc+1} has duplicate {v}")
-                        else:
-                            seen[v] = True
-        return conflicts
+        return find_conflicts(b, self.k)
 
     def solve(self):
+        if self.worker is not None:
+            return
         board = self.read_board()
-        conflicts = self.find_conflicts(board)
+        conflicts = self.current_conflicts()
         if conflicts:
             messagebox.showerror("Cannot Solve", "\n".join(conflicts))
             return
-        if self.backtrack(board):
-            self.write_board(board)
-            messagebox.showinfo("Solved", "Sudoku solved successfully!")
+        try:
+            self.time_limit = float(self.time_limit_var.get() or 0)
+        except ValueError:
+            messagebox.showerror("Cannot Solve", "Time limit must be a number of seconds.")
+            return
+        if self.cache is not None:
+            cached = self.cache.get(board, self.k)
+            if cached is not None:
+                self.write_board(cached)
+                self.status_var.set("Solved from cache.")
+                messagebox.showinfo("Solved", "Sudoku solved successfully!")
+                return
+        self.worker_puzzle = board
+        # solve in a separate process so the window stays responsive and can cancel;
+        # plain backtracking cannot finish 16x16/25x25 grids, so use propagation
+        self.worker_queue = mp.Queue()
+        self.worker = mp.Process(target=solve_worker, args=(board, self.k, self.worker_queue),
+                                 daemon=True)
+        self.worker.start()
+        self.solve_started = perf_counter()
+        self.worker_nodes = 0
+        self.canonical_checked = False
+        self.status_var.set("Solving...")
+        self.root.after(self.poll_ms, self.poll_worker)
+
+    def poll_worker(self):
+        if self.worker is None:
+            return
+        elapsed = perf_counter() - self.solve_started
+        result = self.read_worker()
+        alive = self.worker.is_alive()
+        if result is None and not alive:
+            # it may have exited just after the read; its final message can
+            # still be in flight, so wait for it briefly before giving up
+            result = self.read_worker(timeout=0.5)
+        if result is not None:
+            _, board, nodes = result
+            self.stop_worker(f"{nodes:,} nodes, {elapsed:.2f} s")
+            if board is None:
+                messagebox.showerror("Unsolvable", "No solution exists for this grid.")
+            else:
+                if self.cache is not None:
+                    self.cache.put(self.worker_puzzle, board, self.k,
+                                   canonical=nodes >= self.cache.canonical_nodes)
+                self.write_board(board)
+                messagebox.showinfo("Solved", "Sudoku solved successfully!")
+        elif not alive:
+            self.stop_worker("Solver stopped unexpectedly.")
+        elif self.cache is not None and not self.canonical_checked:
+            # still searching at the first poll, so worth canonicalizing:
+            # an equivalent puzzle may be in the cache
+            self.canonical_checked = True
+            cached = self.cache.get(self.worker_puzzle, self.k, canonical=True)
+            if cached is not None:
+                self.stop_worker("Solved from cache.")
+                self.write_board(cached)
+                messagebox.showinfo("Solved", "Sudoku solved successfully!")
+            else:
+                self.root.after(self.poll_ms, self.poll_worker)
+        elif self.time_limit and elapsed > self.time_limit:
+            self.stop_worker(f"Gave up after {self.time_limit:g} s ({self.worker_nodes:,} nodes).")
         else:
-            messagebox.showerror("Unsolvable", "No solution exists for this grid.")
+            self.status_var.set(f"Solving... {self.worker_nodes:,} nodes, {elapsed:.1f} s")
+            self.root.after(self.poll_ms, self.poll_worker)
+
+    def read_worker(self, timeout=None):
+        # record progress messages; returns the ("done", ...) message, or None
+        # if none arrives (within timeout seconds, if given)
+        try:
+            while True:
+                if timeout is None:
+                    msg = self.worker_queue.get_nowait()
+                else:
+                    msg = self.worker_queue.get(timeout=timeout)
+                if msg[0] == "progress":
+                    self.worker_nodes = msg[1]
+                else:
+                    return msg
+        except queue.Empty:
+            return None
+
+    def stop_worker(self, status):
+        if self.worker.is_alive():
+            self.worker.terminate()
+        self.worker.join()
+        self.worker = None
+        self.worker_queue = None
+        self.status_var.set(status)
+
+    def cancel_solve(self):
+        if self.worker is not None:
+            self.stop_worker("Cancelled.")
 
     def backtrack(self, b):
-        empty = self.find_empty(b)
-        if not empty:
-            return True
-        r, c = empty
-        for num in range(1, 10):
-            if self.is_safe(b, r, c, num):
-                b[r][c] = num
-                if self.backtrack(b):
-                    return True
-                b[r][c] = 0
-        return False
+        return self.engine.solve(b)
 
     def solve_visual(self):
         board = self.read_board()
-        conflicts = self.find_conflicts(board)
+        conflicts = self.current_conflicts()
         if conflicts:
             messagebox.showerror("Cannot Solve", "\n".join(conflicts))
             return
@@ -161,7 +283,7 @@ class SudokuApp:
             messagebox.showinfo("Solved", "Sudoku solved successfully!")
             return True
         r, c = empty
-        for num in range(1, 10):
+        for num in range(1, self.n + 1):
             if self.is_safe(b, r, c, num):
                 b[r][c] = num
                 self.entries[r][c].delete(0, tk.END)
@@ -186,27 +308,20 @@ class SudokuApp:
         self.paused = not self.paused
 
     def find_empty(self, b):
-        for r in range(9):
-            for c in range(9):
-                if b[r][c] == 0:
-                    return (r, c)
-        return None
+        return self.engine.find_empty(b)
 
     def is_safe(self, b, r, c, num):
-        if any(b[r][i] == num for i in range(9)): return False
-        if any(b[i][c] == num for i in range(9)): return False
-        br, bc = r//3*3, c//3*3
-        for i in range(3):
-            for j in range(3):
-                if b[br+i][bc+j] == num: return False
-        return True
+        return self.engine.is_safe(b, r, c, num)
 
     def clear(self):
-        for r in range(9):
-            for c in range(9):
+        for r in range(self.n):
+            for c in range(self.n):
                 self.entries[r][c].delete(0, tk.END)
 
     def load_sample(self):
+        if self.n != 9:
+            messagebox.showinfo("Load Sample", "The sample grid is only available for 9x9.")
+            return
         sample = [
             [5,3,0,0,7,0,0,0,0],
             [6,0,0,1,9,5,0,0,0],
@@ -222,6 +337,16 @@ class SudokuApp:
 
 
 if __name__ == "__main__":
+    # batch solving and the rule report run headless: see Sudoku_core.py
+    parser = argparse.ArgumentParser(description="Sudoku solver.")
+    parser.add_argument("--box", type=int, choices=BOX_SIZES, default=3,
+                        help="box size k of the starting grid (3 = 9x9)")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="keep solutions in this cache file (default: no cache)")
+    parser.add_argument("--cache-size", type=int, default=100000,
+                        help="entries kept before least recently used ones are evicted")
+    args = parser.parse_args()
+    cache = SolutionCache(args.cache, args.cache_size) if args.cache else None
     root = tk.Tk()
-    app = SudokuApp(root)
+    app = SudokuApp(root, box=args.box, cache=cache)
     root.mainloop()
@@ -1,13 +1,24 @@
 import math
 import sys
+import threading
+from time import perf_counter
 import pygame
-from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN, K_r, K_u
+from pygame.locals import QUIT, MOUSEBUTTONDOWN, KEYDOWN, K_a, K_r, K_u
 
 """
 Tic-Tac-Toe (adjustable grid) with Alpha-Beta pruning
 ----------------------------------------------------------
 - Left click to place your mark (Player X by default).
 - Press R to restart, U to undo last human move (if allowed).
+- While you think, the AI ponders: it searches its answers to your most
+  likely replies in a background thread. If you play one of them it
+  answers at once (and possibly from a deeper search); any other move
+  discards the ponder search. Hits and time saved show in the side panel.
+- Press A for analysis mode: a background thread scores every empty cell
+  for the side to move, one search depth at a time, and the board shows
+  the scores as a heatmap that sharpens as each depth finishes. Scores
+  already searched are kept, so after a move (or an undo) the new
+  position picks up from them instead of starting over.
 - Change BOARD_N to adjust grid size (e.g., 3..5 works well).
 - WIN_LENGTH can be <= BOARD_N; default is BOARD_N (N-in-a-row).
 
@@ -41,6 +52,13 @@ GLOW_STEPS = 8  # quality/speed tradeoff
 MAX_SEARCH_TIME_MS = 1200  # soft limit; not strictly enforced in this basic version
 MAX_DEPTH = 3  # cap depth for larger boards if needed
 
+# Pondering (searching on the human's time)
+PONDER = True
+PONDER_EXTRA_DEPTH = 1  # once every predicted reply is answered, search them again this much deeper
+
+# Analysis mode (heatmap of every empty cell)
+ANALYSIS_MAX_DEPTH = 5  # deepest analysis search; it also stops once it reaches the end of the game
+
 # ============================
 # Core game state
 # ============================
@@ -102,6 +120,7 @@ def help_screen():
         "",
         "Left click to place your mark.",
         "Press R to restart current game. Press U to undo last human move (if allowed).",
+        "Press A to show a score for every empty cell (analysis heatmap, green = good).",
         "Use the settings screen to choose:",
         " - Board Size: number of rows/columns (N x N)",
         " - Your Mark: choose X or O (if you choose O then AI starts)",
@@ -391,7 +410,14 @@ def order_moves(moves, b, player):
     return sorted(moves, key=priority)
 
 
-def alphabeta(b, depth, alpha, beta, maximizing):
+class _SearchStopped(Exception):
+    pass
+
+
+def alphabeta(b, depth, alpha, beta, maximizing, stop=None):
+    # stop: threading.Event that abandons a background (ponder or analysis) search
+    if stop is not None and stop.is_set():
+        raise _SearchStopped
     winner = check_winner(b)
     if winner is not None:
         return evaluate(b), None
@@ -406,7 +432,7 @@ def alphabeta(b, depth, alpha, beta, maximizing):
         value = -math.inf
         for (r,c) in moves:
             make_move(b, r, c, AI_PLAYS)
-            score, _ = alphabeta(b, depth-1, alpha, beta, False)
+            score, _ = alphabeta(b, depth-1, alpha, beta, False, stop)
             undo_move(b, r, c)
             if score > value:
                 value, best_move = score, (r, c)
@@ -418,7 +444,7 @@ def alphabeta(b, depth, alpha, beta, maximizing):
         value = math.inf
         for (r,c) in moves:
             make_move(b, r, c, HUMAN_PLAYS)
-            score, _ = alphabeta(b, depth-1, alpha, beta, True)
+            score, _ = alphabeta(b, depth-1, alpha, beta, True, stop)
             undo_move(b, r, c)
             if score < value:
                 value, best_move = score, (r, c)
@@ -428,15 +454,19 @@ def alphabeta(b, depth, alpha, beta, maximizing):
         return value, best_move
 
 
-def ai_choose_move(b):
+def ai_search_depth(b):
     empties = sum(1 for r in range(BOARD_N) for c in range(BOARD_N) if b[r][c] == EMPTY)
     # Dynamic depth: search deeper early when board is empty (lower branching),
     # and shallower late when nearly full (to keep UI responsive for large N).
     if BOARD_N <= 3:
-        depth = 9  # full search for 3x3
-    else:
-        depth = min(MAX_DEPTH, max(3, min(6, empties // 2)))
-    _, move = alphabeta(b, depth, -math.inf, math.inf, True)
+        return 9  # full search for 3x3
+    return min(MAX_DEPTH, max(3, min(6, empties // 2)))
+
+
+def ai_choose_move(b, depth=None, stop=None):
+    if depth is None:
+        depth = ai_search_depth(b)
+    _, move = alphabeta(b, depth, -math.inf, math.inf, True, stop)
     # Fallback if pruning returns None (shouldn't happen normally)
     if move is None:
         lm = legal_moves(b)
@@ -444,6 +474,197 @@ def ai_choose_move(b):
     return move
 
 
+# ============================
+# Pondering
+# ============================
+
+ponder_thread = None
+ponder_stop = None
+ponder_results = {}  # human reply -> (AI answer, depth, seconds its normal-depth search took)
+ponder_stats = {"hits": 0, "misses": 0, "saved": 0.0}
+
+
+def predicted_replies(b, stop=None):
+    """Human moves, most likely first: the ones leaving the AI the lowest
+    score one ply later."""
+    scored = []
+    for (r, c) in legal_moves(b):
+        make_move(b, r, c, HUMAN_PLAYS)
+        score, _ = alphabeta(b, 1, -math.inf, math.inf, True, stop)
+        undo_move(b, r, c)
+        scored.append((score, (r, c)))
+    scored.sort()
+    return [move for _, move in scored]
+
+
+def ponder_worker(b, results, stop):
+    # answer every predicted reply at the normal depth, then again deeper
+    try:
+        replies = predicted_replies(b, stop)
+        for extra in range(PONDER_EXTRA_DEPTH + 1):
+            for (r, c) in replies:
+                make_move(b, r, c, HUMAN_PLAYS)
+                try:
+                    empties = len(legal_moves(b))
+                    depth = ai_search_depth(b)
+                    if check_winner(b) is not None or (extra and depth >= empties):
+                        continue  # game over, or the normal search already reaches the end
+                    start = perf_counter()
+                    move = ai_choose_move(b, depth + extra, stop)
+                    seconds = perf_counter() - start
+                finally:
+                    undo_move(b, r, c)
+                saved = results[(r, c)][2] if (r, c) in results else seconds
+                results[(r, c)] = (move, depth + extra, saved)
+    except _SearchStopped:
+        pass
+
+
+def start_ponder():
+    global ponder_thread, ponder_stop, ponder_results
+    stop_ponder()
+    if not PONDER or check_winner(board) is not None:
+        return
+    ponder_stop = threading.Event()
+    ponder_results = {}
+    ponder_thread = threading.Thread(target=ponder_worker,
+                                     args=([row[:] for row in board], ponder_results, ponder_stop),
+                                     daemon=True)
+    ponder_thread.start()
+
+
+def stop_ponder():
+    """End the ponder search (results so far stay in ponder_results);
+    True if one was running."""
+    global ponder_thread
+    if ponder_thread is None:
+        return False
+    ponder_stop.set()
+    ponder_thread.join()
+    ponder_thread = None
+    return True
+
+
+def take_ponder_move(reply):
+    """AI answer to the human's reply from the ponder search, or None."""
+    global ponder_results
+    if not stop_ponder():
+        return None
+    hit = ponder_results.get(reply)
+    ponder_results = {}
+    if hit is None:
+        ponder_stats["misses"] += 1
+        return None
+    ponder_stats["hits"] += 1
+    ponder_stats["saved"] += hit[2]
+    return hit[0]
+
+
+def ponder_report():
+    tries = ponder_stats["hits"] + ponder_stats["misses"]
+    rate = ponder_stats["hits"] / tries if tries else 0.0
+    return (f"Ponder: {ponder_stats['hits']}/{tries} hits ({rate:.0%}), "
+            f"{ponder_stats['saved']:.1f}s saved")
+
+
+# ============================
+# Analysis
+# ============================
+
+analysis_on = False
+analysis_thread = None
+analysis_stop = None
+analysis_values = {}  # (board key, depth) -> exact search value, kept from position to position
+analysis_view = None  # (board key, depth, {move: score for the side to move}) of the deepest finished depth
+
+
+def board_key(b):
+    return tuple(map(tuple, b))
+
+
+def side_to_move(b):
+    # X always starts
+    xs = sum(row.count('X') for row in b)
+    os_ = sum(row.count('O') for row in b)
+    return 'X' if xs == os_ else 'O'
+
+
+def analysis_value(b, depth, values, stop=None, expand=0):
+    """Exact value (AI's point of view) of b searched depth plies, from or
+    into values. The first `expand` plies are searched move by move, so
+    their positions get entries too: that is what a position one move
+    later finds already done."""
+    key = (board_key(b), depth)
+    value = values.get(key)
+    if value is None:
+        maximizing = side_to_move(b) == AI_PLAYS
+        if expand and depth and check_winner(b) is None:
+            player = AI_PLAYS if maximizing else HUMAN_PLAYS
+            scores = []
+            for (r, c) in legal_moves(b):
+                make_move(b, r, c, player)
+                try:
+                    scores.append(analysis_value(b, depth - 1, values, stop, expand - 1))
+                finally:
+                    undo_move(b, r, c)
+            value = max(scores) if maximizing else min(scores)
+        else:
+            value, _ = alphabeta(b, depth, -math.inf, math.inf, maximizing, stop)
+        values[key] = value
+    return value
+
+
+def analysis_worker(b, values, stop):
+    # iterative deepening over every move; publishes each finished depth
+    global analysis_view
+    key = board_key(b)
+    player = side_to_move(b)
+    sign = 1 if player == AI_PLAYS else -1
+    moves = legal_moves(b)
+    try:
+        for depth in range(1, min(len(moves), ANALYSIS_MAX_DEPTH) + 1):
+            scores = {}
+            for (r, c) in moves:
+                make_move(b, r, c, player)
+                try:
+                    scores[(r, c)] = sign * analysis_value(b, depth - 1, values, stop, 1)
+                finally:
+                    undo_move(b, r, c)
+            analysis_view = (key, depth, scores)
+    except _SearchStopped:
+        pass
+
+
+def start_analysis():
+    """Analyse the current position in the background if analysis is on."""
+    global analysis_thread, analysis_stop
+    stop_analysis()
+    if not analysis_on or check_winner(board) is not None:
+        return
+    analysis_stop = threading.Event()
+    analysis_thread = threading.Thread(target=analysis_worker,
+                                       args=([row[:] for row in board], analysis_values, analysis_stop),
+                                       daemon=True)
+    analysis_thread.start()
+
+
+def stop_analysis():
+    global analysis_thread
+    if analysis_thread is None:
+        return
+    analysis_stop.set()
+    analysis_thread.join()
+    analysis_thread = None
+
+
+def current_analysis():
+    """(depth, scores) of the analysis of the board on screen, or None."""
+    view = analysis_view
+    if not analysis_on or view is None or view[0] != board_key(board):
+        return None
+    return view[1], view[2]
+
+
 # ============================
 # Rendering  
 # ============================
@@ -471,6 +692,33 @@ def draw_glow_circle(surf, center, radius, color, thickness=4):
     pygame.draw.circle(surf, color, center, radius, thickness)
 
 
+def score_text(score):
+    if score >= 1_000_000:
+        return "win"
+    if score <= -1_000_000:
+        return "loss"
+    return f"{score:+d}"
+
+
+def draw_analysis(depth, scores):
+    # green cells are good for the side to move, red bad; wins and losses are the most opaque
+    overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
+    best = max(scores.values())
+    for (r, c), score in scores.items():
+        rect = pygame.Rect(GRID_ORIGIN[0] + c * CELL_SIZE, GRID_ORIGIN[1] + r * CELL_SIZE,
+                           CELL_SIZE, CELL_SIZE).inflate(-10, -10)
+        strength = min(1.0, math.log10(1 + abs(score)) / 6)
+        colour = (60, 230, 120) if score > 0 else (255, 70, 90) if score < 0 else (160, 170, 190)
+        pygame.draw.rect(overlay, colour + (int(40 + 120 * strength),), rect, border_radius=6)
+        if score == best:
+            pygame.draw.rect(overlay, (240, 250, 255, 220), rect, 2, border_radius=6)
+    screen.blit(overlay, (0, 0))
+    for (r, c), score in scores.items():
+        txt = small_font.render(score_text(score), True, (240, 250, 255))
+        center = (GRID_ORIGIN[0] + c * CELL_SIZE + CELL_SIZE // 2, GRID_ORIGIN[1] + r * CELL_SIZE + CELL_SIZE // 2)
+        screen.blit(txt, txt.get_rect(center=center))
+
+
 def draw_board():
     screen.fill(BG_COLOR)
     # Draw board grid
@@ -505,6 +753,10 @@ def draw_board():
                 radius = (CELL_SIZE // 2) - pad
                 draw_glow_circle(screen, center, radius, O_Dim, LINE_THICKNESS)
 
+    analysis = current_analysis()
+    if analysis is not None:
+        draw_analysis(*analysis)
+
     # Side panel (menu/help)
     pygame.draw.rect(screen, (10, 12, 20), PANEL_RECT, border_radius=8)
     pygame.draw.rect(screen, Game_GRID, PANEL_RECT, 2, border_radius=8)
@@ -538,6 +790,16 @@ def draw_board():
         f"Win length: {WIN_LENGTH}",
         f"AI depth cap: {MAX_DEPTH}",
     ]
+    if PONDER:
+        tries = ponder_stats["hits"] + ponder_stats["misses"]
+        hint_lines.append(f"Ponder hits: {ponder_stats['hits']}/{tries}")
+        hint_lines.append(f"Time saved: {ponder_stats['saved']:.1f}s")
+    if not analysis_on:
+        hint_lines.append("Analysis: off (A)")
+    elif analysis is None:
+        hint_lines.append("Analysis: thinking")
+    else:
+        hint_lines.append(f"Analysis: depth {analysis[0]}")
     for i, line in enumerate(hint_lines):
         txt = small_font.render(line, True, (200, 220, 240))
         screen.blit(txt, (PANEL_RECT.left + 16, legend_y + i*24))
@@ -564,6 +826,8 @@ def pos_to_cell(mx, my):
 
 def reset():
     global board, current_player, move_history
+    stop_ponder()
+    stop_analysis()
     # prepare dynamic structures for the current BOARD_N
     prepare_game()
     move_history = []
@@ -573,6 +837,7 @@ def reset():
         ai_move()
     else:
         current_player = 'X'
+    start_analysis()
 
 
 # ============================
@@ -583,13 +848,18 @@ def ai_move():
     global current_player
     if check_winner(board) is not None:
         return
-    move = ai_choose_move(board)
+    stop_analysis()  # leave the AI the whole CPU
+    move = take_ponder_move(move_history[-1]) if move_history else None
+    if move is None:
+        move = ai_choose_move(board)
     if move:
         r, c = move
         if board[r][c] == EMPTY:
             make_move(board, r, c, AI_PLAYS)
             move_history.append((r, c))
             current_player = HUMAN_PLAYS
+            start_ponder()
+    start_analysis()
 
 
 # ============================
@@ -611,9 +881,13 @@ while running:
             if event.key == K_r:
                 # Restart current game (keeps settings)
                 reset()
+            elif event.key == K_a:
+                analysis_on = not analysis_on
+                start_analysis()
             elif event.key == K_u:
                 # Undo last human move if it's AI's turn (optional)
                 if current_player == AI_PLAYS and move_history:
+                    stop_ponder()
                     # If last was AI move, undo it and also the preceding human move
                     last_r, last_c = move_history.pop()
                     undo_move(board, last_r, last_c)
@@ -625,13 +899,18 @@ while running:
                             move_history.pop(idx)
                             break
                     current_player = HUMAN_PLAYS
+                    start_analysis()
         elif event.type == MOUSEBUTTONDOWN and event.button == 1:
             mx, my = event.pos
             # Handle clicks on side panel buttons first
             if hasattr(draw_board, 'main_btn_rect') and hasattr(draw_board, 'help_btn_rect'):
                 if point_in_rect((mx, my), draw_board.main_btn_rect):
                     # Open main/settings screen
+                    stop_ponder()
+                    stop_analysis()
                     settings_screen()
+                    # sides, board size or win length may change what the values mean
+                    analysis_values.clear()
                     # reapply changes
                     prepare_game()
                     reset()
@@ -652,9 +931,16 @@ while running:
                         draw_board()
                         if check_winner(board) is None:
                             ai_move()
+                        else:
+                            stop_ponder()
+                            stop_analysis()
 
     draw_board()
     clock.tick(FPS)
 
+stop_ponder()
+stop_analysis()
+if PONDER:
+    print(ponder_report())
 pygame.quit()
 sys.exit()
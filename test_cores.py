@@ -0,0 +1,468 @@
+"""
+Tests for the headless cores: the Sudoku solvers, solution cache and
+packed corpora, and the Black Hole search and tablebase.
+
+    python -m pytest -q
+"""
+
+import itertools
+import os
+import queue
+import random
+import threading
+
+import pytest
+
+import Black_hole_engine as engine
+import Black_hole_tablebase as tablebase
+import Sudoku_pack as pack
+from Sudoku_cache import SolutionCache, apply_transform, board_key, canonical_form, invert_transform
+from Sudoku_core import BOX_SIZES, RULES, BacktrackSolver, Grid, PropagationSolver, find_conflicts
+
+CORPORA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Sudoku_corpora.txt")
+
+
+def corpus(name, count=None):
+    """Puzzle strings of one [name] section of Sudoku_corpora.txt."""
+    puzzles, section = [], None
+    with open(CORPORA) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = line[1:-1]
+            elif section == name:
+                puzzles.append(line.split()[0])
+    return puzzles[:count]
+
+
+def assert_solves(puzzle, solution):
+    assert 0 not in solution.cells
+    assert not find_conflicts(solution.to_rows(), puzzle.k)
+    assert all(g in (0, v) for g, v in zip(puzzle.cells, solution.cells))
+
+
+# --- propagation rules -------------------------------------------------------
+
+@pytest.mark.parametrize("name", ["easy", "hard"])
+def test_propagation_solves_corpus(name):
+    solver = PropagationSolver()
+    for text in corpus(name, 5):
+        puzzle = Grid.from_string(text)
+        grid = puzzle.copy()
+        assert solver.solve(grid)
+        assert_solves(puzzle, grid)
+        assert solver.count_solutions(puzzle.copy()) == 1
+
+
+def test_propagation_agrees_with_backtracking():
+    solver, reference = PropagationSolver(), BacktrackSolver()
+    for text in corpus("easy", 5):
+        expected = Grid.from_string(text)
+        assert reference.solve(expected)
+        grid = Grid.from_string(text)
+        assert solver.solve(grid)
+        assert grid == expected
+
+
+@pytest.mark.parametrize("rule", RULES)
+def test_each_rule_finds_the_solution(rule):
+    solver = PropagationSolver(rules=("naked_single", rule))
+    reference = PropagationSolver(rules=("naked_single",))
+    for text in corpus("hard", 3):
+        expected = Grid.from_string(text)
+        assert reference.solve(expected)
+        grid = Grid.from_string(text)
+        assert solver.solve(grid)
+        assert grid == expected
+
+
+def test_rules_keep_the_solution_candidate():
+    solver = PropagationSolver()
+    for text in corpus("hard", 5):
+        solution = Grid.from_string(text)
+        assert solver.solve(solution)
+        masks = solver.candidates(Grid.from_string(text))
+        assert masks is not None
+        for mask, v in zip(masks, solution.cells):
+            assert mask >> (v - 1) & 1
+
+
+def test_contradiction_has_no_solution():
+    text = corpus("easy", 1)[0]
+    grid = Grid.from_string(text)
+    # a second copy of a given digit in the same row
+    row = grid.to_rows()[0]
+    given = next(v for v in row if v)
+    col = row.index(0)
+    grid[0, col] = given
+    assert PropagationSolver().count_solutions(grid) == 0
+
+
+# --- vectorized checks -------------------------------------------------------
+
+def random_grids(k, rng, count=12):
+    """Solutions, puzzles cut from them and copies of both with one cell
+    overwritten by a random value (usually a conflict), as flat cell bytes."""
+    n = k * k
+    solver = PropagationSolver(k, rng=rng)
+    grids = []
+    for _ in range(count // 4):
+        solution = Grid(k)
+        assert solver.solve(solution)
+        puzzle = bytearray(solution.cells)
+        for i in rng.sample(range(n * n), n * n // 2):
+            puzzle[i] = 0
+        for cells in (bytes(solution.cells), bytes(puzzle)):
+            corrupted = bytearray(cells)
+            corrupted[rng.randrange(n * n)] = rng.randint(1, n)
+            grids += [cells, bytes(corrupted)]
+    return grids
+
+
+@pytest.mark.parametrize("k", [3, 4])
+def test_validate_batch_matches_find_conflicts(k):
+    np = pytest.importorskip("numpy")
+    from Sudoku_numpy import validate_batch
+
+    n = k * k
+    grids = random_grids(k, random.Random(k))
+    result = validate_batch(np.frombuffer(b"".join(grids), dtype=np.uint8).reshape(-1, n, n))
+    assert result.valid.any() and not result.valid.all()
+    checker = BacktrackSolver(k)
+    for g, cells in enumerate(grids):
+        rows = Grid(k, cells).to_rows()
+        conflicts = find_conflicts(rows, k)
+        for name, flags in (("Row", result.row_conflicts), ("Column", result.col_conflicts),
+                            ("Box", result.box_conflicts)):
+            bad = {int(message.split()[1]) - 1 for message in conflicts if message.startswith(name + " ")}
+            assert set(np.flatnonzero(flags[g])) == bad
+        assert result.valid[g] == (not conflicts)
+        assert result.solved[g] == (not conflicts and 0 not in cells)
+        for r in range(n):
+            for c in range(n):
+                expected = 0
+                if not rows[r][c]:
+                    for d in range(1, n + 1):
+                        if checker.is_safe(rows, r, c, d):
+                            expected |= 1 << (d - 1)
+                assert result.candidates[g, r, c] == expected
+    out_of_range = np.frombuffer(grids[1], dtype=np.uint8).reshape(1, n, n).copy()
+    out_of_range[0, 0, 0] = n + 1
+    assert not validate_batch(out_of_range).valid[0]
+
+
+# --- canonical form and solution cache ---------------------------------------
+
+def shuffle_symmetry(rows, rng, k=3):
+    """rows under a random Sudoku symmetry: relabelled digits, shuffled
+    bands/stacks and rows/columns inside them, maybe transposed."""
+    n = k * k
+
+    def order():
+        bands = rng.sample(range(k), k)
+        return [band * k + inner for band in bands for inner in rng.sample(range(k), k)]
+
+    labels = [0] + rng.sample(range(1, n + 1), n)
+    rs, cs = order(), order()
+    g = [[labels[rows[r][c]] for c in cs] for r in rs]
+    return [list(col) for col in zip(*g)] if rng.random() < 0.5 else g
+
+
+def test_canonical_form_is_symmetry_invariant():
+    rng = random.Random(5)
+    for text in corpus("hard", 3):
+        rows = Grid.from_string(text).to_rows()
+        key, _ = canonical_form(rows)
+        for _ in range(3):
+            assert canonical_form(shuffle_symmetry(rows, rng))[0] == key
+
+
+def test_transform_round_trip():
+    for text in corpus("easy", 3) + corpus("hard", 3):
+        rows = Grid.from_string(text).to_rows()
+        key, transform = canonical_form(rows)
+        canonical = apply_transform(rows, transform)
+        assert board_key(canonical) == key
+        assert invert_transform(canonical, transform) == rows
+
+
+def test_cache_exact_and_canonical_hits(tmp_path):
+    text = corpus("hard", 1)[0]
+    puzzle = Grid.from_string(text).to_rows()
+    solution = Grid.from_string(text)
+    assert PropagationSolver().solve(solution)
+    cache = SolutionCache(str(tmp_path / "cache.sqlite"))
+    try:
+        assert cache.get(puzzle) is None
+        cache.put(puzzle, solution.to_rows(), canonical=True)
+        assert cache.get(puzzle) == solution.to_rows()
+        other = shuffle_symmetry(puzzle, random.Random(9))
+        assert cache.get(other) is None
+        hit = cache.get(other, canonical=True)
+        assert hit is not None
+        assert_solves(Grid.from_rows(other), Grid.from_rows(hit))
+        assert (cache.hits, cache.misses) == (2, 2)
+    finally:
+        cache.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    puzzles = [Grid.from_string(text).to_rows() for text in corpus("easy", 3)]
+    cache = SolutionCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    try:
+        for puzzle in puzzles[:2]:
+            cache.put(puzzle, puzzle)
+        assert cache.get(puzzles[0]) is not None
+        cache.put(puzzles[2], puzzles[2])
+        assert cache.get(puzzles[1]) is None
+        assert cache.get(puzzles[0]) is not None
+        assert cache.get(puzzles[2]) is not None
+    finally:
+        cache.close()
+
+
+# --- Black Hole search -------------------------------------------------------
+
+def brute_force(state):
+    """Exact (player 1 - player 2) score by full minimax, no pruning."""
+    if state.is_over():
+        return state.evaluate()
+    values = []
+    for cell, num in state.legal_moves():
+        state.place(cell, num)
+        values.append(brute_force(state))
+        state.unplace(cell)
+    return max(values) if state.to_move == 2 else min(values)
+
+
+def small_positions(count=6):
+    rng = random.Random(3)
+    return [engine.random_state(rng, placed, rows)
+            for rows, placed in itertools.islice(itertools.cycle([(3, 1), (3, 2), (4, 5), (4, 6)]), count)]
+
+
+@pytest.mark.parametrize("use_tt", [False, True])
+def test_negamax_matches_brute_force(use_tt):
+    tt = engine.TranspositionTable(1) if use_tt else None
+    for state in small_positions():
+        expected = brute_force(state)
+        key = state.key
+        score, (cell, num) = engine.search(state, state.empty_count - 1, tt)
+        assert score == expected
+        assert state.key == key
+        state.place(cell, num)
+        assert brute_force(state) == expected
+        state.unplace(cell)
+
+
+def test_exact_empties_solves_to_the_end():
+    for state in small_positions():
+        expected = brute_force(state)
+        assert engine.search(state, 1, exact_empties=state.empty_count)[0] == expected
+        assert engine.minimax_search(state, 1, exact_empties=state.empty_count)[0] == expected
+
+
+def test_tt_keeps_depth_limited_scores():
+    tt = engine.TranspositionTable(1)
+    for state in small_positions():
+        for depth in (1, 2, 3):
+            assert engine.search(state, depth, tt) == engine.search(state, depth)
+
+
+def test_set_stop_flag_stops_the_search():
+    stop = threading.Event()
+    stop.set()
+    state = engine.random_state(random.Random(1), 3)
+    with pytest.raises(engine.SearchStopped):
+        engine.Negamax(stop=stop).search(state, 6)
+
+
+# --- Black Hole tablebase ----------------------------------------------------
+
+def board_of(state):
+    """state as the UI's board: (player, num) or None per circle."""
+    board = [None] * state.geo.cells
+    for player in (1, 2):
+        for cell, num in enumerate(state.values[player]):
+            if num:
+                board[cell] = (player, num)
+    return board
+
+
+def mirrored(state):
+    board = [None] * state.geo.cells
+    for player in (1, 2):
+        for cell, num in enumerate(state.values[player]):
+            if num:
+                board[state.geo.mirror[cell]] = (player, num)
+    return engine.State.from_board(board, {p: set(state.numbers(p)) for p in (1, 2)}, state.to_move)
+
+
+def endgames(count=8, rows=4, empties=4, seed=11):
+    rng = random.Random(seed)
+    cells = engine.pyramid(rows).cells
+    return [engine.random_state(rng, cells - empties, rows) for _ in range(count)]
+
+
+def test_tablebase_lookups(tmp_path):
+    states = endgames()
+    entries = {}
+    for state in states:
+        key, score, cell, num = tablebase.canonical_entry(state, *engine.search(state, state.empty_count - 1))
+        entries[key] = (score, cell, num)
+    path = str(tmp_path / "tb.bin")
+    tablebase.write_tablebase(path, 4, 4, entries)
+    tb = tablebase.Tablebase(path)
+    try:
+        assert (tb.rows, tb.empties, tb.count) == (4, 4, len(entries))
+        for state in states:
+            for position in (state, mirrored(state)):
+                score, (cell, num) = tb.probe(position)
+                assert score == brute_force(position)
+                position.place(cell, num)
+                assert brute_force(position) == score
+                position.unplace(cell)
+                assert engine.search(position, 1, tb=tb) == (score, (cell, num))
+        misses = [state for state in endgames(12, seed=12)
+                  if min(tablebase.endgame_keys(state)) not in entries]
+        assert misses
+        assert all(tb.probe(state) is None for state in misses)
+    finally:
+        tb.close()
+
+
+def test_deepening_depths_ignore_a_tablebase_miss(tmp_path):
+    states = endgames()
+    entries = {}
+    for state in states[:4]:
+        key, score, cell, num = tablebase.canonical_entry(state, *engine.search(state, state.empty_count - 1))
+        entries[key] = (score, cell, num)
+    path = str(tmp_path / "tb.bin")
+    tablebase.write_tablebase(path, 4, 4, entries)
+    tb = tablebase.Tablebase(path)
+    try:
+        assert engine.deepening_depths(states[0], 2, tb=tb) == [3]
+        misses = [state for state in states[4:] if min(tablebase.endgame_keys(state)) not in entries]
+        assert misses
+        for state in misses:
+            assert engine.deepening_depths(state, 2, tb=tb) == [1, 2]
+    finally:
+        tb.close()
+
+
+def test_think_worker_answers_from_the_tablebase(tmp_path):
+    state = endgames(1, empties=5)[0]
+    score, move = engine.search(state, state.empty_count - 1)
+    key, score, cell, num = tablebase.canonical_entry(state, score, move)
+    path = str(tmp_path / "tb.bin")
+    tablebase.write_tablebase(path, 4, 5, {key: (score, cell, num)})
+    board = board_of(state)
+    hands = {p: set(state.numbers(p)) for p in (1, 2)}
+    out = queue.Queue()
+    # with several workers a miss would start a pool; a hit must not need one
+    engine.think_worker(board, hands, 2, 0, path, out, workers=4)
+    message = out.get_nowait()
+    assert message[:4] == ("depth", 4, score, (cell, num))
+    assert message[-1]["nodes"] == 0
+    assert out.get_nowait() == ("done",)
+
+
+def test_generate_writes_a_sorted_table(tmp_path):
+    path = str(tmp_path / "tb.bin")
+    count = tablebase.generate(path, placements=3, games=4, workers=1, seed=1, depth=1,
+                               random_moves=2, rows=4, log=None)
+    tb = tablebase.Tablebase(path)
+    try:
+        assert (tb.rows, tb.empties, tb.count) == (4, 4, count)
+        keys = [tablebase.KEY.unpack_from(tb.map, tablebase.HEADER.size + i * tablebase.ENTRY.size)[0]
+                for i in range(count)]
+        assert keys == sorted(set(keys))
+    finally:
+        tb.close()
+
+
+@pytest.mark.parametrize("data", [b"", b"BHTB", b"\0" * 64,
+                                  tablebase.HEADER.pack(tablebase.MAGIC, tablebase.VERSION, 4, 4, 3)])
+def test_tablebase_rejects_other_files(tmp_path, data):
+    path = tmp_path / "not_tb.bin"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        tablebase.Tablebase(str(path))
+
+
+def test_think_worker_skips_a_broken_tablebase(tmp_path):
+    path = tmp_path / "tb.bin"
+    path.write_bytes(tablebase.MAGIC)  # an interrupted generator run
+    state = engine.random_state(random.Random(2), 5, 4)
+    board = board_of(state)
+    out = queue.Queue()
+    engine.think_worker(board, {p: set(state.numbers(p)) for p in (1, 2)}, 2, 0, str(path), out)
+    assert [message[:2] for message in iter(out.get_nowait, ("done",))] == [("depth", 1), ("depth", 2)]
+
+
+# --- packed corpora ----------------------------------------------------------
+
+@pytest.mark.parametrize("k", BOX_SIZES)
+def test_pack_round_trip(k):
+    rng = random.Random(k)
+    cells = bytearray(k ** 4)
+    for _ in range(20):
+        values = bytes(rng.randint(0, k * k) for _ in range(k ** 4))
+        record = pack.pack_cells(values, k)
+        assert len(record) == pack.record_size(k)
+        pack.unpack_into(memoryview(record), cells, k)
+        assert cells == values
+
+
+def test_pack_rejects_bad_cells():
+    with pytest.raises(ValueError):
+        pack.pack_cells(bytes(80))
+    with pytest.raises(ValueError):
+        pack.pack_cells(bytes([10]) + bytes(80))
+
+
+@pytest.mark.parametrize("k", BOX_SIZES)
+def test_corpus_round_trip(tmp_path, k):
+    rng = random.Random(k)
+    grids = [Grid(k, bytes(rng.randint(0, k * k) for _ in range(k ** 4))) for _ in range(7)]
+    path = str(tmp_path / "grids.sdkp")
+    with pack.CorpusWriter(path, k) as writer:
+        writer.section("first")
+        for grid in grids[:3]:
+            writer.write(grid)
+        writer.section("second")
+        for grid in grids[3:]:
+            writer.write(grid.to_string())
+    corpus = pack.PackedCorpus(path)
+    try:
+        assert (corpus.k, len(corpus)) == (k, len(grids))
+        assert corpus.sections == {"first": range(0, 3), "second": range(3, 7)}
+        assert [grid.copy() for grid in corpus.grids()] == grids
+        assert corpus.grid(5) == grids[5]
+        assert [grid.copy() for grid in corpus.grids(2, 4)] == grids[2:4]
+    finally:
+        corpus.close()
+
+
+def test_text_round_trip(tmp_path):
+    packed, text = str(tmp_path / "corpora.sdkp"), str(tmp_path / "corpora.txt")
+    expected = list(pack.read_text(CORPORA))
+    assert pack.text_to_packed(CORPORA, packed) == len(expected)
+    assert pack.packed_to_text(packed, text) == len(expected)
+    assert [(section, Grid.from_string(grid)) for section, grid in pack.read_text(text)] == \
+        [(section, Grid.from_string(grid)) for section, grid in expected]
+
+
+def test_shards_cover_every_record_once(tmp_path):
+    path = str(tmp_path / "corpora.sdkp")
+    pack.text_to_packed(CORPORA, path)
+    corpus = pack.PackedCorpus(path)
+    try:
+        for records in (None, corpus.sections["hard"]):
+            for parts in (1, 3, 7, corpus.count + 2):
+                covered = [i for lo, hi in corpus.shards(parts, records) for i in corpus.records_in(lo, hi)]
+                assert covered == list(records or range(corpus.count))
+    finally:
+        corpus.close()